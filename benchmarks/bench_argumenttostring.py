@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+Compare argumentToString()'s exact-type fast paths for scalars to
+dispatching through functools.singledispatch.
+
+  python benchmarks/bench_argumenttostring.py
+"""
+
+import os
+import sys
+import timeit
+
+# Import icecream from this checkout, not an installed copy, when run as
+# python benchmarks/bench_argumenttostring.py.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from icecream import argumentToString
+
+
+CASES = [
+    ('int', 12345),
+    ('float', 3.14159),
+    ('bool', True),
+    ('None', None),
+    ('str', 'hello world'),
+]
+
+
+def dispatched(obj):
+    return argumentToString.dispatch(type(obj))(obj)
+
+
+def bench(fn, obj):
+    timer = timeit.Timer(lambda: fn(obj))
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number
+
+
+def main():
+    print('%-6s %16s %16s' % ('type', 'singledispatch', 'fast path'))
+    for name, obj in CASES:
+        assert dispatched(obj) == argumentToString(obj)
+        print('%-6s %14.0fns %14.0fns' % (
+            name, bench(dispatched, obj) * 1e9,
+            bench(argumentToString, obj) * 1e9))
+
+
+if __name__ == '__main__':
+    main()
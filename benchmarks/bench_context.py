@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+The cost of each context field, next to the naive formatting it replaces,
+and of whole ic.format() calls with a few context templates.
+
+  python benchmarks/bench_context.py
+"""
+
+import os
+import sys
+import time
+import timeit
+from datetime import datetime
+
+# Import icecream from this checkout, not an installed copy, when run as
+# python benchmarks/bench_context.py.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from icecream import IceCreamDebugger
+from icecream.context import BUILTIN_FIELDS
+
+
+NAIVE = {
+    'ts': lambda frame: '%.3f' % time.time(),
+    'time': lambda frame: datetime.now().strftime('%H:%M:%S.%f')[:-3],
+    'pid': lambda frame: str(os.getpid()),
+}
+
+TEMPLATES = [
+    '{ts} {pid} {path}',
+    '{ts} {pid} {file}:{line}',
+    '{elapsed} {tid}',
+]
+
+
+def bench(fn):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(3, number)) / number
+
+
+def main():
+    frame = sys._getframe()
+    print('%-10s %12s %12s' % ('field', 'icecream', 'naive'))
+    for name, getter in BUILTIN_FIELDS.items():
+        naive = NAIVE.get(name)
+        print('%-10s %10.3fus %12s' % (
+            name, bench(lambda: getter(frame)) * 1e6,
+            '%10.3fus' % (bench(lambda: naive(frame)) * 1e6) if naive else ''))
+
+    print()
+    print('%-28s %12s' % ('ic.format() with template', 'per call'))
+    for template in TEMPLATES:
+        ic = IceCreamDebugger(includeContext=True, contextFormat=template)
+        print('%-28s %10.2fus' % (template, bench(lambda: ic.format(1)) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
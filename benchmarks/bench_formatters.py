@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+Compare builtin repr() to icecream's bounded, iterative repr engine.
+
+  python benchmarks/bench_formatters.py
+"""
+
+import os
+import sys
+import timeit
+from dataclasses import dataclass
+
+# Import icecream from this checkout, not an installed copy, when run as
+# python benchmarks/bench_formatters.py.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from icecream.formatters import BoundedRepr
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+CASES = [
+    ('small list', [1, 2, 3, 4, 5]),
+    ('small dict', {'a': 1, 'b': 2.5, 'c': None}),
+    ('small nested', {'a': [1, 2], 'b': {'c': 'd'}}),
+    ('dataclass', Point(1, 2)),
+    ('large list', list(range(1000000))),
+    ('large nested', [{'id': i, 'tags': ['x'] * 10} for i in range(100000)]),
+]
+
+
+def bench(fn, obj):
+    timer = timeit.Timer(lambda: fn(obj))
+    number, _ = timer.autorange()
+    return min(timer.repeat(3, number)) / number
+
+
+def main():
+    bounded = BoundedRepr()
+    print('%-14s %14s %14s' % ('case', 'repr()', 'BoundedRepr'))
+    for name, obj in CASES:
+        print('%-14s %12.2fus %12.2fus' % (
+            name, bench(repr, obj) * 1e6, bench(bounded.repr, obj) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
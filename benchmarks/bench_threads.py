@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+Throughput of ic() from many threads at once, and a check that every
+output line is intact. Formatting happens outside the output lock, so on a
+free-threaded build (e.g. python3.13t) throughput should scale with the
+number of threads. With --format, ic.format() is measured instead, which
+takes none of icecream's locks once call sites are cached. Threads still
+share the call site caches' dicts and hit counters, which free-threaded
+builds synchronize per object, so how close to linear it scales is for
+this benchmark to tell.
+
+  python benchmarks/bench_threads.py
+  python benchmarks/bench_threads.py --threads 64 --calls 100000
+  python3.13t benchmarks/bench_threads.py --format --threads 1 2 4 8
+"""
+
+import argparse
+import io
+import os
+import re
+import sys
+import threading
+import time
+
+# Import icecream from this checkout, not an installed copy, when run as
+# python benchmarks/bench_threads.py.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from icecream import IceCreamDebugger
+from icecream.output import writeRecord
+
+
+LINE_RE = re.compile(r"^ic\| token: '(T\d+-\d+)'$")
+
+
+def run(numThreads, calls, formatOnly=False):
+    stream = io.StringIO()
+    ic = IceCreamDebugger(outputFunction=lambda s: writeRecord(s, stream))
+    barrier = threading.Barrier(numThreads + 1)
+
+    def worker(threadIndex):
+        barrier.wait()
+        for i in range(calls):
+            token = 'T%i-%i' % (threadIndex, i)
+            if formatOnly:
+                ic.format(token)
+            else:
+                ic(token)
+
+    threads = [
+        threading.Thread(target=worker, args=(i,)) for i in range(numThreads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if formatOnly:
+        return numThreads * calls / elapsed, None
+
+    lines = stream.getvalue().splitlines()
+    intact = (
+        len(lines) == numThreads * calls and
+        all(LINE_RE.match(line) for line in lines) and
+        len(set(lines)) == len(lines))
+    return numThreads * calls / elapsed, intact
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16, 64])
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument(
+        '--format', action='store_true', help='Measure ic.format().')
+    args = parser.parse_args()
+
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print('GIL %s' % ('enabled' if gil else 'disabled'))
+    print('%8s %14s %8s %8s' % ('threads', 'calls/s', 'speedup', 'intact'))
+    run(1, 10, args.format)  # Analyze the call sites before timing.
+    baseline = None
+    for numThreads in args.threads:
+        rate, intact = run(numThreads, args.calls, args.format)
+        baseline = baseline or rate / numThreads
+        print('%8i %14.0f %7.1fx %8s' % (
+            numThreads, rate, rate / baseline,
+            '-' if intact is None else intact))
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,12 @@ from os.path import dirname, join as pjoin
 
 from .icecream import *  # noqa
 from .builtins import install, uninstall
+from .importhook import (
+    stripCalls, specializeCalls, removeImportHook, writeStrippedCalls,
+    writeSpecializedCalls)
+from .signals import installSignalHandlers, removeSignalHandlers
+from .admin import serveAdmin, stopAdmin
+from .context import addContextField, removeContextField
 
 # Import all variables in __version__.py without explicit imports.
 from . import __version__
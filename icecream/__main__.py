@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import sys
+
+from .admin import ctl
+from .importhook import rewriteCommand
+
+
+USAGE = """Usage:
+  python -m icecream ctl <pid or path> <command>
+  python -m icecream specialize -o <output dir> <package> ...
+  python -m icecream strip -o <output dir> <package> ..."""
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else None
+    if command == 'ctl':
+        return ctl(argv[1:])
+    if command in ('specialize', 'strip'):
+        return rewriteCommand(command, argv[1:])
+    print(USAGE, file=sys.stderr)
+    return 2
+
+
+sys.exit(main())
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+An optional admin endpoint to observe and tune ic() in a running process,
+on a Unix domain socket served by a daemon thread:
+
+  import icecream
+  icecream.serveAdmin()  # On /tmp/icecream-<pid>.sock.
+
+  $ python -m icecream ctl <pid> stats
+  $ python -m icecream ctl <pid> set sampleEvery 100
+  $ python -m icecream ctl <pid> set include 'myapp.billing.*'
+
+The protocol is one command per line, answered by one line of JSON,
+{"ok": true, "result": ...} or {"ok": false, "error": "..."}:
+
+  stats                 Call, hit, drop, and cache stats, and the config.
+  hits                  Calls per call site, most called first.
+  config                The current config.
+  set <name> <value>    Set enabled, prefix, includeContext, sampleEvery,
+                        include, or exclude. <value> is JSON, or a string.
+  help                  This list.
+
+In a forked child, like a prefork server's worker, an endpoint served on
+the default path is served again on the child's own path. Others aren't.
+Each process removes the sockets it serves on when it exits.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+
+from .forks import atFork
+
+SETTABLE = ('enabled', 'prefix', 'includeContext', 'sampleEvery',
+            'include', 'exclude')
+DEFAULT_TIMEOUT = 5  # Seconds.
+
+
+def defaultSocketPath(pid=None):
+    return os.path.join(
+        tempfile.gettempdir(), 'icecream-%i.sock' % (pid or os.getpid()))
+
+
+class CommandError(Exception):
+    pass
+
+
+def parseValue(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text  # E.g. an unquoted prefix, like set prefix debug|.
+
+
+def configOf(debugger):
+    prefix = debugger.prefix
+    return {
+        'enabled': debugger.enabled,
+        'prefix': prefix if isinstance(prefix, str) else repr(prefix),
+        'includeContext': debugger.includeContext,
+        'sampleEvery': debugger.sampleEvery,
+        'include': debugger.include,
+        'exclude': debugger.exclude,
+    }
+
+
+def hitsOf(debugger):
+    hits = debugger.callStats()['hits']
+    return [
+        {'file': filename, 'line': lineno, 'hits': count}
+        for (filename, lineno), count in sorted(
+            hits.items(), key=lambda item: -item[1])]
+
+
+def runCommand(debugger, line):
+    """
+    Run the command <line> against <debugger>. Returns its JSON-able result
+    or raises CommandError.
+    """
+    # Only the line's end is trimmed, so values can end in spaces.
+    parts = line.rstrip('\r\n').split(None, 2)
+    if not parts:
+        raise CommandError('Empty command.')
+    command, args = parts[0], parts[1:]
+
+    if command == 'stats':
+        callStats = debugger.callStats()
+        return {
+            'hits': sum(callStats['hits'].values()),
+            'callSites': len(callStats['hits']),
+            'dropped': callStats['dropped'],
+            'caches': debugger.cacheStats(),
+            'config': configOf(debugger),
+        }
+    elif command == 'hits':
+        return hitsOf(debugger)
+    elif command == 'config':
+        return configOf(debugger)
+    elif command == 'set':
+        if len(args) != 2 or args[0] not in SETTABLE:
+            raise CommandError(
+                'Usage: set <name> <value>, where <name> is one of %s.' %
+                ', '.join(SETTABLE))
+        name, value = args[0], parseValue(args[1])
+        try:
+            if name == 'enabled' and value:
+                debugger.enable()
+            elif name == 'enabled':
+                debugger.disable()
+            else:
+                debugger.configureOutput(**{name: value})
+        except (TypeError, ValueError) as e:
+            raise CommandError(str(e))
+        return configOf(debugger)
+    elif command == 'help':
+        return __doc__[__doc__.index('  stats'):].rstrip()
+    raise CommandError('Unknown command %r. Try help.' % command)
+
+
+class AdminHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                line = line.decode('utf8')
+                response = {
+                    'ok': True,
+                    'result': runCommand(self.server.debugger, line)}
+            except (CommandError, UnicodeDecodeError) as e:
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(response).encode('utf8') + b'\n')
+            self.wfile.flush()
+
+
+class AdminServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, debugger, defaultPath=False):
+        self.path = path
+        self.debugger = debugger
+        self.defaultPath = defaultPath
+        self.pid = os.getpid()
+        self.successor = None  # This server's replacement in a forked child.
+        # Closed, or inherited by a forked child. Either way, not served
+        # again after a fork.
+        self.abandoned = False
+        removeStaleSocket(path)
+        socketserver.UnixStreamServer.__init__(self, path, AdminHandler)
+        self.thread = threading.Thread(
+            target=self.serve_forever, name='icecream-admin', daemon=True)
+        self.thread.start()
+        atFork(afterInChild=self._afterForkInChild)
+        atexit.register(self._removeSocket)
+
+    def server_bind(self):
+        # Bound in a private directory and only then linked into place, so
+        # the socket is never connectable with the umask's permissions. Only
+        # the process's user may connect. Unlike os.rename(), os.link()
+        # never replaces an existing file.
+        privateDir = tempfile.mkdtemp(
+            prefix='.ic', dir=os.path.dirname(os.path.abspath(self.path)))
+        tmpPath = os.path.join(privateDir, 's')
+        try:
+            self.socket.bind(tmpPath)
+            os.chmod(tmpPath, 0o600)
+            os.link(tmpPath, self.path)
+        finally:
+            removeStaleSocket(tmpPath)
+            os.rmdir(privateDir)
+        self.server_address = self.path
+
+    def _afterForkInChild(self):
+        # The serving thread didn't survive the fork, and the socket and
+        # its path are the parent's.
+        if self.abandoned:
+            return
+        self.abandoned = True
+        self.socket.close()
+        if self.defaultPath:
+            self.successor = AdminServer(
+                defaultSocketPath(), self.debugger, defaultPath=True)
+
+    def _removeSocket(self):
+        # atexit hooks are inherited by forked children, whose exits must
+        # leave the parent's socket be.
+        if self.pid == os.getpid():
+            removeStaleSocket(self.path)
+
+    def close(self):
+        if self.pid != os.getpid():  # Inherited from a parent process.
+            if self.successor is not None:
+                self.successor.close()
+            return
+        if self.abandoned:
+            return
+        self.abandoned = True
+        atexit.unregister(self._removeSocket)
+        self.shutdown()
+        self.server_close()
+        removeStaleSocket(self.path)
+
+
+def removeStaleSocket(path):
+    # E.g. left behind by an earlier process with the same pid. Never
+    # remove anything but a socket.
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+    except OSError:
+        pass
+
+
+def serveAdmin(path=None, debugger=None):
+    """
+    Serve the admin endpoint for <debugger>, ic by default, on the Unix
+    domain socket <path>, /tmp/icecream-<pid>.sock by default, from a daemon
+    thread. Returns the server, which can be passed to stopAdmin().
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise RuntimeError('Unix domain sockets are unavailable.')
+    if debugger is None:
+        from .icecream import ic as debugger
+    if path is None:
+        return AdminServer(defaultSocketPath(), debugger, defaultPath=True)
+    return AdminServer(path, debugger)
+
+
+def stopAdmin(server):
+    server.close()
+
+
+def sendCommand(path, command, timeout=DEFAULT_TIMEOUT):
+    """
+    Send the command line <command> to the admin endpoint at <path>. Returns
+    the decoded JSON response.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(command.encode('utf8') + b'\n')
+        with sock.makefile('rb') as f:
+            return json.loads(f.readline().decode('utf8'))
+
+
+def ctl(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m icecream ctl',
+        description='Query or configure ic() in a running process.')
+    parser.add_argument(
+        'target', help="The process's pid or admin socket path.")
+    parser.add_argument(
+        'command', nargs='+', help='E.g. stats, or set sampleEvery 10.')
+    args = parser.parse_args(argv)
+
+    path = args.target
+    if path.isdigit():
+        path = defaultSocketPath(int(path))
+    command = args.command
+    if command[0] == 'set' and len(command) > 3:
+        command = command[:2] + [' '.join(command[2:])]
+
+    try:
+        response = sendCommand(path, ' '.join(command))
+    except OSError as e:
+        print('Failed to connect to %s: %s' % (path, e), file=sys.stderr)
+        return 1
+    if not response['ok']:
+        print(response['error'], file=sys.stderr)
+        return 1
+    result = response['result']
+    print(result if isinstance(result, str) else json.dumps(result, indent=2))
+    return 0
+
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+Summarizing argumentToString() formatters for NumPy arrays and pandas
+DataFrames and Series. This module never imports NumPy or pandas itself;
+the formatters are registered lazily, the first time an instance is
+formatted, from the modules already in sys.modules.
+"""
+
+import sys
+
+from .stats import formatNumber
+
+
+# Arrays, DataFrames, and Series with at most this many elements are
+# formatted with their regular repr().
+SUMMARY_THRESHOLD = 1000
+PREVIEW_EDGE_ITEMS = 3
+PREVIEW_ROWS = 6
+PREVIEW_COLUMNS = 10
+
+
+def formatBytes(n):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if n < 1024 or unit == 'GiB':
+            break
+        n /= 1024.0
+    return '%s %s' % (formatNumber(round(n, 1)), unit)
+
+
+def formatFields(name, fields):
+    # ndarray(shape=(1000, 3), dtype=float64, ...)
+    return '%s(%s)' % (name, ', '.join('%s=%s' % kv for kv in fields))
+
+
+def numericStats(numpy, values):
+    """
+    Vectorized min, max, mean, and NaN count of the int, uint, or float
+    ndarray <values>. Other dtypes have no stats.
+    """
+    if values.dtype.kind not in 'iuf' or not values.size:
+        return []
+
+    nans = 0
+    if values.dtype.kind == 'f':
+        nans = int(numpy.count_nonzero(numpy.isnan(values)))
+        if nans == values.size:
+            return [('nan', nans)]
+        stats = [numpy.nanmin(values), numpy.nanmax(values),
+                 numpy.nanmean(values)]
+    else:
+        stats = [values.min(), values.max(), values.mean()]
+
+    stats = [formatNumber(x.item()) for x in stats]
+    return list(zip(('min', 'max', 'mean'), stats)) + [('nan', nans)]
+
+
+def ndarrayToString(obj):
+    numpy = sys.modules['numpy']
+    if obj.size <= SUMMARY_THRESHOLD:
+        return repr(obj)
+
+    fields = [
+        ('shape', obj.shape), ('dtype', obj.dtype),
+        ('size', formatBytes(obj.nbytes))]
+    if isinstance(obj, numpy.ma.MaskedArray):
+        # Stats of the unmasked values only, and numpy.ma's own str(),
+        # which prints masked values as --, not whatever data is under
+        # them.
+        fields += numericStats(numpy, obj.compressed())
+        fields.append(('masked', int(numpy.ma.count_masked(obj))))
+        with numpy.printoptions(threshold=0, edgeitems=PREVIEW_EDGE_ITEMS):
+            preview = str(obj)
+    else:
+        fields += numericStats(numpy, obj)
+        preview = numpy.array2string(
+            obj, threshold=0, edgeitems=PREVIEW_EDGE_ITEMS, separator=', ')
+    # The subclass's name, e.g. MaskedArray or matrix, not ndarray.
+    return formatFields(type(obj).__name__, fields) + '\n' + preview
+
+
+def dataFrameToString(obj):
+    if obj.size <= SUMMARY_THRESHOLD:
+        return repr(obj)
+
+    numpy = sys.modules['numpy']
+    dtypes = obj.dtypes.value_counts()
+    fields = [
+        ('shape', obj.shape),
+        ('dtypes', ', '.join('%s(%i)' % kv for kv in dtypes.items())),
+        ('size', formatBytes(int(obj.memory_usage(deep=False).sum()))),
+        ('nan', int(obj.isna().values.sum()))]
+
+    out = [formatFields('DataFrame', fields)]
+    numeric = obj.select_dtypes(include=[numpy.number, 'bool']).iloc[
+        :, :PREVIEW_COLUMNS]
+    if not numeric.empty:
+        stats = numeric.agg(['min', 'max', 'mean'])
+        out.append(stats.to_string())
+    out.append(obj.to_string(
+        max_rows=PREVIEW_ROWS, max_cols=PREVIEW_COLUMNS,
+        show_dimensions=False))
+    return '\n'.join(out)
+
+
+def seriesToString(obj):
+    if obj.size <= SUMMARY_THRESHOLD:
+        return repr(obj)
+
+    numpy = sys.modules['numpy']
+    fields = [
+        ('name', repr(obj.name)), ('length', len(obj)), ('dtype', obj.dtype),
+        ('size', formatBytes(int(obj.memory_usage(deep=False))))]
+    if isinstance(obj.dtype, numpy.dtype):
+        fields += numericStats(numpy, obj.to_numpy())
+    else:
+        fields.append(('nan', int(obj.isna().sum())))
+    preview = obj.to_string(max_rows=PREVIEW_ROWS, name=False, dtype=False)
+    return formatFields('Series', fields) + '\n' + preview
+
+
+def registerNumpy(dispatcher):
+    numpy = sys.modules['numpy']
+    dispatcher.register(numpy.ndarray, ndarrayToString)
+
+
+def registerPandas(dispatcher):
+    pandas = sys.modules['pandas']
+    dispatcher.register(pandas.DataFrame, dataFrameToString)
+    dispatcher.register(pandas.Series, seriesToString)
+
+
+# Top-level module names, i.e. type(obj).__module__.split('.')[0], of
+# objects whose formatters are registered on first sight.
+LAZY_REGISTRATIONS = {
+    'numpy': registerNumpy,
+    'pandas': registerPandas,
+}
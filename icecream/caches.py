@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+Bounded, (approximately) least recently used caches for everything ic() keeps per source
+file or call site, so long-running processes that touch hundreds of
+modules don't accumulate parsed source without bound. Also writes on-disk
+caches, like those of call sites and rewritten code, atomically.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from .forks import atFork
+
+
+class LRUCache:
+    """
+    A mapping that holds at most <maxEntries> entries and, if <sizeof> is
+    given, entries totaling at most <maxBytes> bytes as estimated by
+    sizeof(value). The least recently used entries are evicted first, and
+    passed to onEvict(key, value). None disables a limit.
+
+    Hits, the hot path, don't lock. They only read the entry and mark its
+    key as used, and eviction gives marked entries a second chance, like
+    the CLOCK algorithm. So recency is approximate, as are <hits> and
+    <misses>. Only writes and evictions lock.
+
+    Only the methods below are supported, which are all that executing's
+    and icecream's caches use.
+    """
+    def __init__(
+            self, maxEntries=None, maxBytes=None, sizeof=None, onEvict=None):
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.sizeof = sizeof
+        self.onEvict = onEvict
+        self.entries = OrderedDict()
+        # Keys hit since they were last considered for eviction.
+        self.used = set()
+        self.sizes = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        atFork(afterInChild=self._afterForkInChild)
+
+    def _afterForkInChild(self):
+        # Another thread may have held the lock, mid update, at the fork.
+        self.lock = threading.Lock()
+        self.bytes = sum(self.sizes.values())
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __getitem__(self, key):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        if key not in self.used:  # Hot keys are only read.
+            self.used.add(key)
+        self.hits += 1
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        size = self.sizeof(value) if self.sizeof else 0
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.sizes.pop(key, 0)
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if size:
+                self.sizes[key] = size
+                self.bytes += size
+            evicted = self._evict(keep=key)
+        for item in evicted:
+            self.onEvict(*item)
+
+    def pop(self, key, default=None):
+        with self.lock:
+            self.bytes -= self.sizes.pop(key, 0)
+            self.used.discard(key)
+            return self.entries.pop(key, default)
+
+    def values(self):
+        with self.lock:
+            return list(self.entries.values())
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.used.clear()
+            self.sizes.clear()
+            self.bytes = 0
+
+    def resize(self, maxEntries=None, maxBytes=None):
+        with self.lock:
+            self.maxEntries = maxEntries
+            self.maxBytes = maxBytes
+            evicted = self._evict()
+        for item in evicted:
+            self.onEvict(*item)
+
+    def _evict(self, keep=None):
+        # Evicts until within budget, except for the newest entry <keep>,
+        # which is kept even if it alone is over budget. Entries used since
+        # they were last considered go to the back of the line instead, at
+        # most once each, so hits racing with eviction can't stall it.
+        # Returns the evicted items for onEvict(), to be called outside of
+        # the lock.
+        evicted = []
+        entries, used = self.entries, self.used
+        secondChances = len(entries)
+        while entries and (
+                (self.maxEntries is not None and
+                 len(entries) > self.maxEntries) or
+                (self.maxBytes is not None and self.bytes > self.maxBytes)):
+            key, value = entries.popitem(last=False)
+            if key == keep or (secondChances and key in used):
+                used.discard(key)
+                entries[key] = value  # To the back of the line.
+                if key != keep:
+                    secondChances -= 1
+                elif len(entries) == 1:
+                    break
+                continue
+            used.discard(key)
+            self.bytes -= self.sizes.pop(key, 0)
+            self.evictions += 1
+            if self.onEvict is not None:
+                evicted.append((key, value))
+        return evicted
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'maxEntries': self.maxEntries,
+            'bytes': self.bytes if self.sizeof else None,
+            'maxBytes': self.maxBytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': self.hits / lookups if lookups else None,
+            'evictions': self.evictions,
+        }
+
+
+class NullCache:
+    """
+    A cache that never holds anything, for caches that are redundant with
+    another, like executing's, whose results callsites.callSiteCache holds.
+    """
+    def __len__(self):
+        return 0
+
+    def __contains__(self, key):
+        return False
+
+    def __getitem__(self, key):
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        pass
+
+    def get(self, key, default=None):
+        return default
+
+
+def writeAtomically(path, data):
+    """
+    Write the bytes <data> to <path> via a temporary file, so concurrent
+    readers, e.g. other processes, see either the old or the new file, never
+    a partial one. Errors, e.g. of a read-only filesystem, are ignored; the
+    file just isn't written.
+    """
+    tmpPath = '%s.%i.tmp' % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmpPath, 'wb') as f:
+            f.write(data)
+        os.replace(tmpPath, path)
+    except OSError:
+        try:
+            os.unlink(tmpPath)
+        except OSError:
+            pass
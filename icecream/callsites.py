@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+A cache of the argument source texts of ic() call sites.
+
+Finding an ic() call's arguments' source texts means parsing the call's
+entire module with executing and asttokens. That's paid once per module
+per process, which dominates the runtime of short-lived processes, like
+CLI tools. So resolved call sites are also persisted to disk, in
+__pycache__/<module>.<cache tag>.icecream next to the module's bytecode,
+and loaded from there, lazily, the first time an ic() call in that module
+runs in later processes. Setting the environment variable
+ICECREAM_PERSIST_CALL_SITES to 0, or ic.configureCaches(
+persistentCallSites=False), turns that off.
+
+Where there's no source, like in a REPL, the arguments of simple calls are
+instead reconstructed from the call's bytecode. See argStrsFromBytecode().
+Either way, each call site is only analyzed once, even if that fails.
+"""
+
+import atexit
+import dis
+import importlib.abc
+import importlib.util
+import marshal
+import os
+import sys
+import threading
+import time
+import weakref
+
+from .caches import LRUCache, writeAtomically
+from .forks import atFork
+
+
+# Bump whenever the on-disk format changes.
+CACHE_FORMAT_VERSION = 1
+
+MISSING = object()
+
+# Budgets of the in-memory caches. Files' call sites are small, but there's
+# no bound on how many files or exec()'d code objects call ic().
+DEFAULT_MAX_FILES = 1024
+DEFAULT_MAX_DYNAMIC_SITES = 4096
+
+# Files are re-stat()'d at most this often, in seconds, to notice edits.
+DEFAULT_STAT_INTERVAL = 1.0
+
+PERSIST_ENV_VAR = 'ICECREAM_PERSIST_CALL_SITES'
+
+
+def siteKey(code, lasti):
+    """
+    Identifies a call site within its file across processes: its code
+    object's qualified name and first line, and the call's bytecode offset.
+    Before Python 3.11, which added co_qualname, its bare name and first
+    line tell a file's functions apart just the same, except those defined
+    on the same line, like lambdas, which co_qualname can't tell apart
+    either.
+    """
+    qualname = getattr(code, 'co_qualname', code.co_name)
+    return (qualname, code.co_firstlineno, lasti)
+
+
+def cachePathFor(filename):
+    try:
+        pycPath = importlib.util.cache_from_source(filename)
+    except (NotImplementedError, ValueError):
+        return None
+    return os.path.splitext(pycPath)[0] + '.icecream'
+
+
+class FileEntry:
+    """
+    The call sites of one source file, valid for its <mtime> and <size>,
+    which were last checked at time.monotonic() <checked>.
+    """
+    __slots__ = ('filename', 'mtime', 'size', 'sites', 'dirty', 'checked')
+
+    def __init__(self, filename, mtime, size, sites=None):
+        self.filename = filename
+        self.mtime = mtime
+        self.size = size
+        self.sites = sites if sites is not None else {}
+        self.dirty = False
+        self.checked = time.monotonic()
+
+
+def dynamicKey(code, lasti):
+    # A weak reference, so exec()'d code isn't kept alive by the cache. Live
+    # references hash and compare like the code objects they refer to.
+    return (weakref.ref(code), lasti)
+
+
+class CallSiteCache:
+    """
+    Argument source texts of call sites, keyed by filename then siteKey().
+    Source files are stat()'d when they're first looked up and then at most
+    once every <statInterval> seconds, so edited files' call sites are
+    re-analyzed without a stat() per ic() call. Modules' call sites are also
+    forgotten when they're reloaded with importlib.reload().
+
+    At most <maxFiles> files and <maxDynamicSites> call sites in code
+    without a file are kept, least recently used first out. Evicted files'
+    call sites are written to disk first.
+
+    <persistent> enables reading and writing the on-disk cache. Writes also
+    respect sys.dont_write_bytecode.
+
+    Lookups don't lock; the LRU caches' hits don't either. Each FileEntry's
+    sites dict is only ever added to, and is copied before it's written to
+    disk. Concurrent misses of a site can both analyze it; the results are
+    the same. <hits> and <misses> are unlocked, so only approximate.
+    """
+    def __init__(
+            self, persistent=True, maxFiles=DEFAULT_MAX_FILES,
+            maxDynamicSites=DEFAULT_MAX_DYNAMIC_SITES,
+            statInterval=DEFAULT_STAT_INTERVAL):
+        self.persistent = persistent
+        self.statInterval = statInterval
+        # Filename -> FileEntry, or None if not a file.
+        self.files = LRUCache(maxFiles, onEvict=self._onEvictFile)
+        # dynamicKey() -> argStrs of call sites in code without a file.
+        self.dynamic = LRUCache(maxDynamicSites)
+        self.hits = 0
+        self.misses = 0
+        self._atexitRegistered = False
+        self._reloadWatcher = None
+        self._lock = threading.Lock()  # For one-time setup.
+        atFork(afterInChild=self._afterForkInChild)
+
+    def _afterForkInChild(self):
+        self._lock = threading.Lock()
+        # The parent writes the call sites it resolved. The child only
+        # writes those it resolves itself.
+        for entry in self.files.values():
+            if entry is not None:
+                entry.dirty = False
+
+    def get(self, frame):
+        """
+        The argument source texts of <frame>'s current call, with None for
+        unknown arguments, or None if nothing is known about the arguments.
+        MISSING if the call site hasn't been set().
+        """
+        code = frame.f_code
+        entry = self.files.get(code.co_filename, MISSING)
+        if entry is MISSING:
+            entry = self._loadFile(code.co_filename)
+        elif entry is not None:
+            now = time.monotonic()
+            if now - entry.checked >= self.statInterval:
+                entry = self._revalidate(entry, now)
+        if entry is None:
+            argStrs = self.dynamic.get(
+                dynamicKey(code, frame.f_lasti), MISSING)
+        else:
+            argStrs = entry.sites.get(siteKey(code, frame.f_lasti), MISSING)
+
+        if argStrs is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return argStrs
+
+    def set(self, frame, argStrs):
+        if argStrs is not None:
+            argStrs = tuple(argStrs)
+
+        code = frame.f_code
+        entry = self.files.get(code.co_filename)
+        if entry is None:
+            # The file doesn't exist, e.g. '<stdin>', so code objects are the
+            # only way to tell its call sites apart.
+            self.dynamic[dynamicKey(code, frame.f_lasti)] = argStrs
+            return
+        entry.sites[siteKey(code, frame.f_lasti)] = argStrs
+        if self.persistent:
+            entry.dirty = True
+            if not self._atexitRegistered:
+                with self._lock:
+                    if not self._atexitRegistered:
+                        atexit.register(self.flush)
+                        self._atexitRegistered = True
+
+    def clear(self):
+        self.files.clear()
+        self.dynamic.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': self.hits / lookups if lookups else None,
+            'files': self.files.stats(),
+            'dynamicSites': self.dynamic.stats(),
+        }
+
+    def _onEvictFile(self, filename, entry):
+        if entry is not None and entry.dirty:
+            entry.dirty = False
+            if self.persistent and not sys.dont_write_bytecode:
+                writeCacheFile(entry)
+
+    def invalidate(self, filename):
+        """
+        Forget the call sites of <filename>, e.g. because it was reloaded.
+        """
+        self.files.pop(filename)
+
+    def _loadFile(self, filename):
+        try:
+            st = os.stat(filename)
+        except (OSError, ValueError):
+            self.files[filename] = None
+            return None
+
+        entry = None
+        if self.persistent:
+            entry = readCacheFile(filename, st)
+        if entry is None:
+            entry = FileEntry(filename, st.st_mtime, st.st_size)
+        self.files[filename] = entry
+        if self._reloadWatcher is None:
+            with self._lock:
+                if self._reloadWatcher is None:
+                    self._reloadWatcher = ReloadWatcher(self)
+                    sys.meta_path.insert(0, self._reloadWatcher)
+        return entry
+
+    def _revalidate(self, entry, now):
+        entry.checked = now
+        try:
+            st = os.stat(entry.filename)
+        except (OSError, ValueError):
+            return entry  # E.g. deleted. The code that's running is unchanged.
+        if st.st_mtime == entry.mtime and st.st_size == entry.size:
+            return entry
+
+        # Edited, e.g. under an autoreloading dev server. Its old call
+        # sites are stale.
+        self.files.pop(entry.filename)
+        return self._loadFile(entry.filename)
+
+    def flush(self):
+        """
+        Write the call sites resolved since they were last written to disk.
+        """
+        if not self.persistent or sys.dont_write_bytecode:
+            return
+        for entry in self.files.values():
+            if entry is not None and entry.dirty:
+                entry.dirty = False
+                writeCacheFile(entry)
+
+
+class ReloadWatcher(importlib.abc.MetaPathFinder):
+    """
+    Never finds anything, but importlib.reload() asks sys.meta_path's
+    finders for the reloaded module's spec, with the module as <target>.
+    That's when its call sites in <cache> are invalidated.
+    """
+    def __init__(self, cache):
+        self.cache = cache
+
+    def find_spec(self, fullname, path, target=None):
+        filename = getattr(target, '__file__', None)
+        if filename is not None:
+            self.cache.invalidate(filename)
+        return None
+
+
+def readCacheFile(filename, st):
+    cachePath = cachePathFor(filename)
+    if cachePath is None:
+        return None
+    try:
+        with open(cachePath, 'rb') as f:
+            data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    valid = (
+        isinstance(data, dict) and
+        data.get('format') == CACHE_FORMAT_VERSION and
+        data.get('python') == sys.version and
+        data.get('mtime') == st.st_mtime and data.get('size') == st.st_size)
+    if not valid:
+        return None
+    return FileEntry(filename, st.st_mtime, st.st_size, data['sites'])
+
+
+def writeCacheFile(entry):
+    cachePath = cachePathFor(entry.filename)
+    if cachePath is None:
+        return
+    writeAtomically(cachePath, marshal.dumps({
+        'format': CACHE_FORMAT_VERSION,
+        'python': sys.version,
+        'mtime': entry.mtime,
+        'size': entry.size,
+        'sites': dict(entry.sites),  # Other threads may be adding sites.
+    }))
+
+
+# Instructions that push the value of a name.
+NAME_OPS = frozenset([
+    'LOAD_NAME', 'LOAD_GLOBAL', 'LOAD_DEREF', 'LOAD_CLASSDEREF',
+    'LOAD_FROM_DICT_OR_DEREF', 'LOAD_FROM_DICT_OR_GLOBALS'])
+CONST_OPS = frozenset(['LOAD_CONST', 'LOAD_SMALL_INT'])
+CALL_OPS = frozenset(['CALL', 'CALL_FUNCTION', 'CALL_METHOD'])
+# Instructions after which execution never continues with the next one.
+NO_FALLTHROUGH_OPS = frozenset([
+    'RETURN_VALUE', 'RETURN_CONST', 'RAISE_VARARGS', 'RERAISE',
+    'JUMP_FORWARD', 'JUMP_ABSOLUTE', 'JUMP_BACKWARD',
+    'JUMP_BACKWARD_NO_INTERRUPT', 'JUMP', 'JUMP_NO_INTERRUPT'])
+# Instructions between a call's last argument and the call itself.
+SKIPPED_OPS = frozenset(['PRECALL', 'EXTENDED_ARG', 'NOP', 'CACHE'])
+
+
+class UnknownExpression(Exception):
+    pass
+
+
+def valueTokens(instructions):
+    """
+    (opname, argval, isJumpTarget) for each instruction of <instructions>,
+    in reverse, with instructions that push two names, like Python 3.13's
+    LOAD_FAST_LOAD_FAST, split into two.
+    """
+    tokens = []
+    for ins in reversed(instructions):
+        opname, argval = ins.opname, ins.argval
+        if opname.startswith('LOAD_FAST') and isinstance(argval, tuple):
+            tokens.append(('LOAD_FAST', argval[1], False))
+            tokens.append(('LOAD_FAST', argval[0], ins.is_jump_target))
+        else:
+            tokens.append((opname, ins, ins.is_jump_target))
+    return tokens
+
+
+def parseExpression(tokens, i):
+    """
+    The source text of the simple expression -- a name, constant,
+    attribute, or subscript -- whose last instruction is tokens[i]. Returns
+    (text, index of the expression's first instruction).
+    """
+    opname, ins, _ = tokens[i]
+    if opname.startswith('LOAD_FAST') or opname in NAME_OPS:
+        name = ins if isinstance(ins, str) else ins.argval
+        return name, i
+    if opname in CONST_OPS:
+        return repr(ins.argval), i
+    if opname == 'LOAD_ATTR' and 'NULL' not in ins.argrepr:
+        obj, start = parseExpression(tokens, i + 1)
+        return '%s.%s' % (obj, ins.argval), start
+    if opname == 'BINARY_SUBSCR' or (
+            opname == 'BINARY_OP' and ins.argrepr == '[]'):
+        index, end = parseExpression(tokens, i + 1)
+        obj, start = parseExpression(tokens, end + 1)
+        return '%s[%s]' % (obj, index), start
+    raise UnknownExpression()
+
+
+def argStrsFromBytecode(code, lasti):
+    """
+    Reconstruct the source texts of the arguments of the call at bytecode
+    offset <lasti> of <code> from its bytecode alone. Only names,
+    constants, attributes, and subscripts, like d['k'].attr, are
+    reconstructed; other arguments are None. Returns None if <lasti> isn't
+    a call.
+    """
+    try:
+        instructions = list(dis.get_instructions(code))
+    except Exception:
+        return None
+
+    # <lasti> can point into the call's inline cache entries, so the call
+    # is the last instruction at or before <lasti>.
+    callIndex = None
+    for i, ins in enumerate(instructions):
+        if ins.offset > lasti:
+            break
+        callIndex = i
+    if callIndex is None or instructions[callIndex].opname not in CALL_OPS:
+        return None
+
+    call = instructions[callIndex]
+    numArgs = call.arg
+    argStrs = [None] * numArgs
+    i = callIndex
+    if call.is_jump_target:
+        return argStrs
+    while i > 0 and instructions[i - 1].opname in SKIPPED_OPS:
+        i -= 1
+        if instructions[i].is_jump_target:
+            return argStrs
+
+    # Walk back from the last argument to the first. Values that reach the
+    # stack along another code path, i.e. via a jump, make every argument
+    # before them unknowable, too.
+    tokens = valueTokens(instructions[:i])
+    pos = 0
+    for argIndex in reversed(range(numArgs)):
+        if pos >= len(tokens):
+            break
+        try:
+            text, start = parseExpression(tokens, pos)
+        except (UnknownExpression, IndexError):
+            break
+        if any(isJumpTarget for _, _, isJumpTarget in tokens[pos:start]):
+            break
+        if tokens[start][2]:
+            # Unless execution also falls through to it, an argument that
+            # starts at a jump target is one branch of a larger expression,
+            # like the o of f(d if y else o), which some versions compile
+            # into two copies of the call.
+            fallsThrough = (
+                start + 1 < len(tokens) and
+                tokens[start + 1][0] not in NO_FALLTHROUGH_OPS)
+            if fallsThrough:
+                argStrs[argIndex] = text
+            break
+        argStrs[argIndex] = text
+        pos = start + 1
+
+    return argStrs
+
+
+callSiteCache = CallSiteCache(
+    persistent=os.environ.get(PERSIST_ENV_VAR, '1') != '0')
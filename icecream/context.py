@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+The fields of ic()'s context, like when, where, and in which thread or
+asyncio task a call was made, and the template they're formatted with:
+
+  ic.configureOutput(contextFormat='{ts} {pid} {tid} {file}:{line}')
+
+Each field is a function of the call's frame that returns a str. A
+template is compiled once, by ContextTemplate, and only calls the fields
+it references. So expensive fields, like the full call path, cost nothing
+unless they're used.
+
+User-defined fields are added with addContextField(), typically from a
+contextvars.ContextVar that's set per request:
+
+  requestId = contextvars.ContextVar('requestId')
+  icecream.addContextField('request', requestId)
+"""
+
+import contextvars
+import os
+import string
+import sys
+import threading
+import time
+from os.path import basename, realpath
+
+from .custom import build_call_path
+from .forks import atFork
+
+
+# The value of fields with nothing to show, like 'task' outside of asyncio.
+NO_VALUE = '-'
+
+_threadIdentity = threading.local()
+
+
+def threadIdentity():
+    """
+    The current thread's (name, native id), looked up once per thread. So
+    a thread renamed after its first ic() call keeps its old name.
+    """
+    try:
+        return _threadIdentity.value
+    except AttributeError:
+        pass
+    getNativeId = getattr(threading, 'get_native_id', threading.get_ident)
+    value = _threadIdentity.value = (
+        threading.current_thread().name, str(getNativeId()))
+    return value
+
+
+def threadName(callFrame):
+    return threadIdentity()[0]
+
+
+def threadNativeId(callFrame):
+    return threadIdentity()[1]
+
+
+def taskName(callFrame):
+    # Code that runs in asyncio tasks has imported asyncio. Don't import it
+    # for code that hasn't.
+    asyncio = sys.modules.get('asyncio')
+    if asyncio is None:
+        return NO_VALUE
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:  # No running event loop.
+        return NO_VALUE
+    if task is None:
+        return NO_VALUE
+    getName = getattr(task, 'get_name', None)  # Python 3.8+.
+    return getName() if getName is not None else NO_VALUE
+
+
+# Timestamps are formatted as a prefix, the same for a whole second, and
+# milliseconds, looked up in MILLIS. The last second's (second, prefix)
+# pairs are cached, and replaced whole, so concurrent threads never see
+# half of one.
+MILLIS = tuple('%03i' % ms for ms in range(1000))
+_epochSecond = (None, None)
+_clockSecond = (None, None)
+
+
+def timestamp(callFrame):
+    global _epochSecond
+    second, ms = divmod(time.time_ns() // 1000000, 1000)
+    cached, prefix = _epochSecond
+    if cached != second:
+        prefix = '%i.' % second
+        _epochSecond = (second, prefix)
+    return prefix + MILLIS[ms]
+
+
+def clockTime(callFrame):
+    global _clockSecond
+    second, ms = divmod(time.time_ns() // 1000000, 1000)
+    cached, prefix = _clockSecond
+    if cached != second:
+        prefix = time.strftime('%H:%M:%S.', time.localtime(second))
+        _clockSecond = (second, prefix)
+    return prefix + MILLIS[ms]
+
+
+START_NS = time.perf_counter_ns()
+
+
+def elapsed(callFrame):
+    # Monotonic, so it's unaffected by changes to the system clock.
+    second, ms = divmod((time.perf_counter_ns() - START_NS) // 1000000, 1000)
+    return '%i.%s' % (second, MILLIS[ms])
+
+
+# os.getpid() only changes in a forked child, so it's cached, and
+# refreshed after forks.
+_pid = str(os.getpid())
+
+
+def afterForkInChild():
+    # The forking thread's native id is new in the child, too.
+    global _pid, _threadIdentity
+    _pid = str(os.getpid())
+    _threadIdentity = threading.local()
+
+
+atFork(afterInChild=afterForkInChild)
+
+
+def pid(callFrame):
+    return _pid
+
+
+def callPath(callFrame):
+    return build_call_path(callFrame)
+
+
+def fileName(callFrame):
+    return basename(callFrame.f_code.co_filename)
+
+
+def absoluteFileName(callFrame):
+    return realpath(callFrame.f_code.co_filename)
+
+
+def lineNumber(callFrame):
+    return str(callFrame.f_lineno)
+
+
+def functionName(callFrame):
+    name = callFrame.f_code.co_name
+    return name if name == "<module>" else "%s()" % name
+
+
+BUILTIN_FIELDS = {
+    'ts': timestamp,  # Seconds since the epoch, like 1731198725.327.
+    'time': clockTime,  # Like 14:03:17.327.
+    'elapsed': elapsed,  # Seconds since icecream was imported, like 2.071.
+    'pid': pid,
+    'path': callPath,  # The whole call stack. See custom.build_call_path().
+    'file': fileName,
+    'line': lineNumber,
+    'func': functionName,
+    'thread': threadName,
+    'tid': threadNativeId,
+    'task': taskName,
+}
+fields = dict(BUILTIN_FIELDS)
+
+DEFAULT_CONTEXT_FORMAT = '{ts} {pid} {path}'
+
+
+def addContextField(name, source, default=NO_VALUE):
+    """
+    Add the context field <name>, whose value is <source>'s, if <source> is
+    a contextvars.ContextVar, or what calling <source>() returns. If the
+    ContextVar isn't set, or <source>() returns None, it's <default>.
+    """
+    if name in BUILTIN_FIELDS:
+        raise ValueError('%r is a built-in context field.' % name)
+
+    if isinstance(source, contextvars.ContextVar):
+        def getter(callFrame):
+            value = source.get(None)
+            return default if value is None else str(value)
+    elif callable(source):
+        def getter(callFrame):
+            value = source()
+            return default if value is None else str(value)
+    else:
+        raise TypeError(
+            'source must be a contextvars.ContextVar or a callable, not %r.'
+            % (source,))
+    fields[name] = getter
+
+
+def removeContextField(name):
+    if name in BUILTIN_FIELDS:
+        raise ValueError('%r is a built-in context field.' % name)
+    fields.pop(name, None)
+
+
+def fieldGetter(name, absPath=False):
+    if name == 'file' and absPath:
+        return absoluteFileName
+    try:
+        return fields[name]
+    except KeyError:
+        raise ValueError(
+            'Unknown context field %r. Known fields are %s.' % (
+                name, ', '.join(sorted(fields))))
+
+
+def withFormatting(getter, conversion, spec):
+    convert = {None: None, 's': str, 'r': repr, 'a': ascii}[conversion]
+
+    def formatted(callFrame):
+        value = getter(callFrame)
+        if convert is not None:
+            value = convert(value)
+        return format(value, spec)
+    return formatted
+
+
+class ContextTemplate:
+    """
+    A str.format()-style template of context fields, like
+    '{ts} {pid} {file}:{line}', compiled once into a %-format string and
+    the getters of the fields it references, in order. <absPath> makes
+    {file} the absolute path. Raises ValueError for unknown fields.
+    """
+    def __init__(self, template, absPath=False):
+        self.template = template
+        self.getters = []
+        pieces = []
+        for literal, name, spec, conversion in (
+                string.Formatter().parse(template)):
+            pieces.append(literal.replace('%', '%%'))
+            if name is None:
+                continue
+            getter = fieldGetter(name, absPath)
+            if spec or conversion:
+                getter = withFormatting(getter, conversion, spec)
+            self.getters.append(getter)
+            pieces.append('%s')
+        self.format = ''.join(pieces)
+
+    def render(self, callFrame):
+        return self.format % tuple(
+            getter(callFrame) for getter in self.getters)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+Include and exclude filters that enable ic() only in some modules, files,
+or functions, like
+
+  ic.configureOutput(include='myapp.billing.*', exclude='func:*_test')
+
+or, without editing code, with the environment variables ICECREAM_INCLUDE
+and ICECREAM_EXCLUDE, read at import time.
+"""
+
+import re
+from fnmatch import translate
+
+
+INCLUDE_ENV_VAR = 'ICECREAM_INCLUDE'
+EXCLUDE_ENV_VAR = 'ICECREAM_EXCLUDE'
+
+# What a pattern is matched against, by its prefix. Unprefixed patterns
+# match module names.
+FIELDS = {
+    'module': 'module',
+    'mod': 'module',
+    'file': 'file',
+    'function': 'function',
+    'func': 'function',
+}
+DEFAULT_FIELD = 'module'
+
+# Decisions are cached per code object. Past this many, like with lots of
+# exec()'d code, the cache starts over rather than keep the code alive.
+MAX_DECISIONS = 4096
+
+
+def parsePatterns(patterns):
+    """
+    Parse <patterns>, an iterable of glob patterns or a str of them
+    separated by commas, into a regex per field that matches any of them.
+    """
+    if patterns is None:
+        return {}
+    if isinstance(patterns, str):
+        patterns = patterns.split(',')
+
+    byField = {}
+    for pattern in patterns:
+        pattern = pattern.strip()
+        if not pattern:
+            continue
+        field, sep, glob = pattern.partition(':')
+        if sep and field in FIELDS:
+            field = FIELDS[field]
+        else:
+            field, glob = DEFAULT_FIELD, pattern
+        byField.setdefault(field, []).append(translate(glob))
+    return {
+        field: re.compile('|'.join(regexes))
+        for field, regexes in byField.items()}
+
+
+def fieldsOf(frame):
+    # Before Python 3.11, code objects have no co_qualname, so func:
+    # patterns match the bare function name. Reconstructing the qualified
+    # name would mean parsing the source, which filters avoid.
+    code = frame.f_code
+    return {
+        'module': frame.f_globals.get('__name__') or '',
+        'file': code.co_filename,
+        'function': getattr(code, 'co_qualname', code.co_name),
+    }
+
+
+def anyMatch(regexes, fields):
+    return any(
+        regex.match(fields[field]) for field, regex in regexes.items())
+
+
+class CallFilter:
+    """
+    Enables ic() calls that match any of the <include> patterns, or all
+    calls if there are none, minus those that match any of the <exclude>
+    patterns. Patterns are globs, like myapp.billing.*, that match module
+    names or, with a file: or func: prefix, filenames or qualified
+    function names (bare function names before Python 3.11).
+
+    allows() is evaluated once per code object, so a filtered ic() call
+    costs a dict lookup. Concurrent first calls can both evaluate it, to
+    the same result, so <decisions> needs no lock.
+    """
+    def __init__(self, include=None, exclude=None):
+        self.include = include
+        self.exclude = exclude
+        self._includes = parsePatterns(include)
+        self._excludes = parsePatterns(exclude)
+        self.decisions = {}
+
+    def __bool__(self):
+        return bool(self._includes or self._excludes)
+
+    def allows(self, frame):
+        # Keyed by id(), not the code object itself, because code objects
+        # compare equal across files. The code is kept, and so its id()
+        # stays unique, with the decision.
+        code = frame.f_code
+        decision = self.decisions.get(id(code))
+        if decision is not None:
+            return decision[1]
+
+        fields = fieldsOf(frame)
+        allowed = (
+            (not self._includes or anyMatch(self._includes, fields)) and
+            not anyMatch(self._excludes, fields))
+        if len(self.decisions) >= MAX_DECISIONS:
+            self.decisions.clear()
+        self.decisions[id(code)] = (code, allowed)
+        return allowed
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+Fork safety, for prefork servers, like gunicorn, that import icecream and
+then os.fork() their workers.
+
+A forked child has only the thread that forked. Locks that other threads
+held at the time stay locked forever, state they were updating is left
+half updated, and their threads, like the admin endpoint's, are gone. So
+each module registers hooks with atFork(): before a fork, to finish or
+block work in progress, and in the child after it, to reset locks and
+per-process state and restart threads.
+"""
+
+import os
+import threading
+import traceback
+import weakref
+
+
+# Serializes registrations, and is held across forks, so hooks registered
+# by other threads are never half added.
+_lock = threading.Lock()
+_before = []
+_afterInChild = []
+_afterInParent = []
+
+
+def _ref(func):
+    # Bound methods are held weakly, so registering an object's hooks
+    # doesn't keep it alive. Functions are held strongly.
+    if getattr(func, '__self__', None) is not None:
+        return weakref.WeakMethod(func)
+    return lambda: func
+
+
+def atFork(before=None, afterInChild=None, afterInParent=None):
+    """
+    Call before() before every os.fork(), and afterInChild() in the child,
+    or afterInParent() in the parent, after it. Like with
+    os.register_at_fork(), before hooks are called in reverse order of
+    registration, and after hooks in order. Hooks are never called where
+    fork() is unavailable, e.g. Windows.
+    """
+    with _lock:
+        for hooks, func in ((_before, before), (_afterInChild, afterInChild),
+                            (_afterInParent, afterInParent)):
+            if func is not None:
+                # Drop the hooks of collected objects, so they don't
+                # accumulate.
+                hooks[:] = [ref for ref in hooks if ref() is not None]
+                hooks.append(_ref(func))
+
+
+def _run(hooks, reverse=False):
+    for ref in (reversed(hooks[:]) if reverse else hooks[:]):
+        func = ref()
+        if func is None:  # The hook's object was garbage collected.
+            continue
+        # Like os.register_at_fork(), a failing hook doesn't stop the rest,
+        # e.g. from releasing locks.
+        try:
+            func()
+        except Exception:
+            traceback.print_exc()
+
+
+def _runBefore():
+    _lock.acquire()
+    _run(_before, reverse=True)
+
+
+def _runAfterInChild():
+    # Released first, so hooks can register hooks, e.g. of new threads.
+    _lock.release()
+    _run(_afterInChild)
+
+
+def _runAfterInParent():
+    _lock.release()
+    _run(_afterInParent)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(
+        before=_runBefore, after_in_child=_runAfterInChild,
+        after_in_parent=_runAfterInParent)
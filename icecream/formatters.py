@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import dataclasses
+import hashlib
+import reprlib
+from itertools import chain, cycle, islice, repeat
+
+
+DEFAULT_MAX_CHARS = 50000
+DEFAULT_MAX_ITEMS = 1000
+DEFAULT_MAX_DEPTH = 32
+DEFAULT_MAX_STRING = 10000
+
+ELLIPSIS = '...'
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+class Output:
+    """
+    Accumulates output parts until <budget> characters have been written,
+    then raises BudgetExhausted so formatting stops immediately.
+    """
+    __slots__ = ('parts', 'remaining', 'budget')
+
+    def __init__(self, budget):
+        self.parts = []
+        self.remaining = budget
+        self.budget = budget
+
+    def write(self, s):
+        self.parts.append(s)
+        self.remaining -= len(s)
+        if self.remaining < 0:
+            raise BudgetExhausted()
+
+    def value(self):
+        return ''.join(self.parts)
+
+    def truncated(self):
+        return ''.join(self.parts)[:self.budget] + ELLIPSIS
+
+
+# Builtin containers holding at most this many items in total, nested
+# items included, are formatted by repr() directly. That's faster than any
+# Python-level engine and still bounded.
+SMALL_TREE_SIZE = 32
+SMALL_SCALAR_TYPES = frozenset([int, float, bool, complex, type(None)])
+CONTAINER_TYPES = frozenset([dict, list, tuple, set, frozenset])
+STRING_TYPES = ({str}, {bytes})
+
+
+class BoundedRepr:
+    """
+    Like reprlib.Repr, but output is built incrementally against a total
+    character budget, so formatting a huge object costs O(maxChars), not
+    O(size of the object). Output is identical to repr() for builtin
+    containers, dataclasses, strings, and bytes within the limits:
+
+      maxChars   Total characters output before truncating with '...'.
+      maxItems   Items shown per list, tuple, dict, set, frozenset, and
+                 dataclass.
+      maxDepth   Container nesting shown before eliding as [...].
+      maxString  Characters shown per str or bytes.
+
+    Containers are walked with an explicit stack, not recursion, so deeply
+    nested values can't hit the recursion limit, and containers that
+    contain themselves are elided as [...], like repr() does. Other objects
+    are formatted with repr() and truncated to maxChars.
+    """
+    def __init__(self, maxChars=DEFAULT_MAX_CHARS, maxItems=DEFAULT_MAX_ITEMS,
+                 maxDepth=DEFAULT_MAX_DEPTH, maxString=DEFAULT_MAX_STRING):
+        self.maxChars = maxChars
+        self.maxItems = maxItems
+        self.maxDepth = maxDepth
+        self.maxString = maxString
+
+    def repr(self, obj):
+        # The most common arguments, scalars, and flat builtin containers and
+        # records of scalars, or of short strings, are told apart by their
+        # items' exact types, with C-level calls only, before any tree is
+        # walked.
+        typ = type(obj)
+        if typ in CONTAINER_TYPES and len(obj) <= SMALL_TREE_SIZE:
+            types = set(map(type, obj))
+            flat = types <= SMALL_SCALAR_TYPES or (
+                types in STRING_TYPES and
+                max(map(len, obj)) <= self.maxString)
+            if flat and typ is dict:
+                values = obj.values()
+                types = set(map(type, values))
+                flat = types <= SMALL_SCALAR_TYPES or (
+                    types in STRING_TYPES and
+                    max(map(len, values)) <= self.maxString)
+            if flat and len(obj) <= self.maxItems and self.maxDepth >= 1:
+                s = repr(obj)
+                return s if len(s) <= self.maxChars else self.truncate(s)
+        elif typ in SMALL_SCALAR_TYPES or self._isFlatRecord(obj, typ):
+            return self.truncate(repr(obj))
+
+        if self._isSmallTree(obj):
+            return self.truncate(repr(obj))
+
+        out = Output(self.maxChars)
+        try:
+            self._format(obj, out)
+        except BudgetExhausted:
+            return out.truncated()
+        return out.value()
+
+    def _format(self, obj, out):
+        # Each stack entry is (items, right, id) for a container being
+        # output: <items> yields (separator, value) pairs still to be output
+        # and <right> closes the container, e.g. ']'.
+        stack = []
+        ancestors = set()  # id()s of the containers on the stack.
+        write = out.write
+
+        self._open(obj, stack, ancestors, write)
+        while stack:
+            items, right, ident = stack[-1]
+            item = next(items, None)
+            if item is None:
+                stack.pop()
+                ancestors.discard(ident)
+                write(right)
+                continue
+
+            separator, value = item
+            if separator:
+                write(separator)
+            self._open(value, stack, ancestors, write)
+
+    def _open(self, obj, stack, ancestors, write):
+        """
+        Output scalars whole. Output the left side of containers and push
+        their items onto <stack>.
+        """
+        typ = type(obj)
+        if typ is list:
+            left, right, empty = '[', ']', '[]'
+        elif typ is tuple:
+            left, right, empty = '(', ',)' if len(obj) == 1 else ')', '()'
+        elif typ is dict:
+            left, right, empty = '{', '}', '{}'
+        elif typ is set:
+            left, right, empty = '{', '}', 'set()'
+        elif typ is frozenset:
+            left, right, empty = 'frozenset({', '})', 'frozenset()'
+        elif typ is str or typ is bytes:
+            write(self.reprString(obj))
+            return
+        else:
+            fields = recordFields(typ)
+            if fields is None:
+                write(repr(obj))
+            else:
+                self._openRecord(obj, fields, stack, ancestors, write)
+            return
+
+        if not obj:
+            write(empty)
+            return
+        ident = id(obj)
+        if ident in ancestors or len(stack) >= self.maxDepth:
+            write(left + ELLIPSIS + right)
+            return
+
+        if self._isSmallTree(obj):
+            write(repr(obj))
+            return
+
+        if typ is dict:
+            values = chain.from_iterable(islice(obj.items(), self.maxItems))
+            separators = chain(('', ': '), cycle((', ', ': ')))
+        else:
+            values = islice(obj, self.maxItems)
+            separators = chain(('',), repeat(', '))
+
+        if len(obj) > self.maxItems:
+            right = ', ' + ELLIPSIS + right
+        write(left)
+        stack.append((zip(separators, values), right, ident))
+        ancestors.add(ident)
+
+    def _openRecord(self, obj, fields, stack, ancestors, write):
+        name, names = fields
+        left, right = name + '(', ')'
+        ident = id(obj)
+        if ident in ancestors or len(stack) >= self.maxDepth:
+            write(left + ELLIPSIS + right)
+            return
+
+        if len(names) > self.maxItems:
+            right = ', ' + ELLIPSIS + right
+            names = names[:self.maxItems]
+        write(left)
+        stack.append((recordItems(obj, names), right, ident))
+        ancestors.add(ident)
+
+    def _isFlatRecord(self, obj, typ):
+        """
+        Whether <obj> is a dataclass or attrs instance, output by its
+        generated __repr__, whose fields are all scalars, or all short
+        strings.
+        """
+        fields = recordFields(typ)
+        if (fields is None or typ.__repr__ is object.__repr__ or
+                len(fields[1]) > self.maxItems or self.maxDepth < 1):
+            return False
+        try:
+            values = list(map(getattr, repeat(obj), fields[1]))
+        except AttributeError:
+            return False
+        types = set(map(type, values))
+        return types <= SMALL_SCALAR_TYPES or (
+            types in STRING_TYPES and max(map(len, values)) <= self.maxString)
+
+    def _isSmallTree(self, obj):
+        """
+        Whether <obj> is a scalar, or a builtin container of few enough
+        builtin scalars and containers, that repr() is both fast and
+        bounded. At most SMALL_TREE_SIZE items are ever visited, so
+        containers that contain themselves aren't small.
+        """
+        # A tree of SMALL_TREE_SIZE items can't nest deeper than that, so
+        # maxDepth is only checked once.
+        if self.maxDepth < SMALL_TREE_SIZE:
+            return type(obj) in SMALL_SCALAR_TYPES
+
+        budget = SMALL_TREE_SIZE
+        maxItems = self.maxItems
+        maxString = self.maxString
+        isScalars = SMALL_SCALAR_TYPES.issuperset
+        pending = [obj]
+        while pending:
+            node = pending.pop()
+            typ = type(node)
+            if typ in SMALL_SCALAR_TYPES:
+                continue
+            if typ is str or typ is bytes:
+                if len(node) > maxString:
+                    return False
+                continue
+            if typ not in CONTAINER_TYPES:
+                return False
+
+            length = len(node)
+            budget -= length
+            if budget < 0 or length > maxItems:
+                return False
+            if typ is dict:
+                if not isScalars(map(type, node.values())):
+                    pending.extend(node.values())
+            if not isScalars(map(type, node)):
+                pending.extend(node)
+        return True
+
+    def truncate(self, s):
+        if len(s) > self.maxChars:
+            s = s[:self.maxChars] + ELLIPSIS
+        return s
+
+    def reprString(self, s):
+        if len(s) <= self.maxString:
+            return repr(s)
+
+        # Only the head and tail are ever repr()'d, never the whole string.
+        head = max(0, (self.maxString - 3) // 2)
+        tail = max(0, self.maxString - 3 - head)
+        r = repr(s[:head] + s[len(s) - tail:])
+        return r[:head] + ELLIPSIS + r[len(r) - tail:]
+
+
+def recordItems(obj, names):
+    # Yields ('x=', obj.x), (', y=', obj.y), ... Unset slots are skipped.
+    separator = ''
+    for name in names:
+        value = getattr(obj, name, _unset)
+        if value is not _unset:
+            yield separator + name + '=', value
+            separator = ', '
+
+
+_unset = object()
+_generatedReprFiles = frozenset([dataclasses.__file__, reprlib.__file__])
+_recordFieldsCache = {}
+
+
+def recordFields(cls):
+    """
+    (name, fieldNames) if instances of <cls> are output like
+    name(field=value, ...), otherwise None. Classes are only introspected
+    once; the result is cached.
+    """
+    try:
+        return _recordFieldsCache[cls]
+    except KeyError:
+        pass
+
+    fields = introspectRecordFields(cls)
+    _recordFieldsCache[cls] = fields
+    return fields
+
+
+def introspectRecordFields(cls):
+    reprFn = cls.__repr__
+    code = getattr(reprFn, '__code__', None)
+    filename = code.co_filename if code is not None else ''
+
+    # Dataclasses and attrs classes, whose __repr__ wasn't written by hand,
+    # are output just like their generated __repr__ would.
+    if (dataclasses.is_dataclass(cls) and hasattr(reprFn, '__wrapped__') and
+            filename in _generatedReprFiles):
+        names = tuple(f.name for f in dataclasses.fields(cls) if f.repr)
+        return cls.__qualname__, names
+    attributes = getattr(cls, '__attrs_attrs__', None)
+    if attributes is not None and filename.startswith('<attrs generated repr'):
+        # Attributes with a custom repr= function aren't supported.
+        if any(a.repr not in (True, False) for a in attributes):
+            return None
+        names = tuple(a.name for a in attributes if a.repr)
+        return cls.__qualname__.rsplit('>.', 1)[-1], names
+
+    # Instances of classes with __slots__, and no __dict__, that would
+    # otherwise be output uselessly by object.__repr__ as <Foo object at
+    # 0x...>.
+    if reprFn is object.__repr__:
+        names = slotNames(cls)
+        if names:
+            return cls.__qualname__, names
+
+    return None
+
+
+def slotNames(cls):
+    """
+    The names of all the __slots__ of <cls> and its bases, or None if
+    instances of <cls> have a __dict__.
+    """
+    names = []
+    for base in reversed(cls.__mro__[:-1]):  # Excluding object.
+        slots = base.__dict__.get('__slots__')
+        if slots is None:
+            return None
+        if isinstance(slots, str):
+            slots = [slots]
+        for name in slots:
+            if name == '__dict__':
+                return None
+            if name.startswith('__') and not name.endswith('__'):
+                name = '_%s%s' % (base.__name__.lstrip('_'), name)  # Mangled.
+            if name != '__weakref__' and name not in names:
+                names.append(name)
+    return tuple(names)
+
+
+DEFAULT_PREVIEW_BYTES = 64
+HEXDUMP_WIDTH = 16  # Bytes per hexdump line.
+
+# Printable ASCII is shown as is in hexdumps. Everything else is shown as '.'.
+ASCII_TABLE = bytes(b if 0x20 <= b < 0x7f else ord('.') for b in range(256))
+
+
+class BytesFormatter:
+    """
+    Formats bytes, bytearrays, and memoryviews. Short ones are output like
+    repr(). Longer ones are output as their length, an optional digest, and
+    a hexdump of their first and last <previewBytes> bytes, like
+
+      bytes(length=1500, sha256=4e07...)
+      00000000  45 00 05 dc 1c 46 40 00  40 06 a7 3c c0 a8 00 68  |E....F@.@..<...h|
+      ...
+      000005d0  ...
+
+    Data is read through a memoryview, so only the previewed bytes are ever
+    copied. <digest>, if provided, is a hashlib algorithm name, like
+    'sha256', and costs a pass over all the data.
+    """
+    def __init__(self, previewBytes=DEFAULT_PREVIEW_BYTES, digest=None):
+        self.previewBytes = previewBytes
+        self.digest = digest
+
+    def format(self, obj):
+        view = memoryview(obj)
+        if view.ndim != 1 or view.itemsize != 1:
+            if not view.c_contiguous:
+                return repr(obj)
+            view = view.cast('B')
+
+        length = view.nbytes
+        if type(obj) is not memoryview and length <= self.previewBytes:
+            return repr(obj)
+
+        fields = ['length=%i' % length]
+        if self.digest:
+            data = view if view.c_contiguous else view.tobytes()
+            fields.append('%s=%s' % (
+                self.digest, hashlib.new(self.digest, data).hexdigest()))
+        lines = ['%s(%s)' % (type(obj).__name__, ', '.join(fields))]
+
+        if length <= 2 * self.previewBytes:
+            lines += self._hexdump(view, 0, length)
+        else:
+            headEnd = self.previewBytes
+            tailStart = (length - self.previewBytes) // HEXDUMP_WIDTH * HEXDUMP_WIDTH
+            lines += self._hexdump(view, 0, headEnd)
+            lines.append(ELLIPSIS)
+            lines += self._hexdump(view, tailStart, length)
+        return '\n'.join(lines)
+
+    def _hexdump(self, view, start, end):
+        lines = []
+        for offset in range(start, end, HEXDUMP_WIDTH):
+            chunk = view[offset:min(offset + HEXDUMP_WIDTH, end)]
+            half = HEXDUMP_WIDTH // 2
+            hexed = '%-23s  %-23s' % (chunk[:half].hex(' '), chunk[half:].hex(' '))
+            text = chunk.tobytes().translate(ASCII_TABLE).decode('ascii')
+            lines.append('%08x  %s  |%s|' % (offset, hexed, text))
+        return lines
+
+
+defaultRepr = BoundedRepr()
+defaultBytesFormatter = BytesFormatter()
@@ -14,15 +14,18 @@
 from __future__ import print_function
 
 import ast
+import atexit
+import contextvars
 import functools
 import inspect
+import numbers
 import os
 import pprint
 import sys
+import threading
 import time
 import warnings
 from contextlib import contextmanager
-from datetime import datetime
 from os.path import basename
 from os.path import realpath
 from textwrap import dedent
@@ -39,7 +42,17 @@ from pygments.formatters import \
 from pygments.lexers import Python3Lexer as Py3Lexer  # pylint: disable=no-name-in-module
 
 from .coloring import SolarizedDark
-from .custom import build_call_path
+from .arrays import LAZY_REGISTRATIONS
+from .caches import LRUCache, NullCache
+from .callsites import MISSING, argStrsFromBytecode, callSiteCache
+from .context import DEFAULT_CONTEXT_FORMAT, ContextTemplate, clockTime
+from .filters import EXCLUDE_ENV_VAR, INCLUDE_ENV_VAR, CallFilter
+from .forks import atFork
+from .output import writeRecord
+from .formatters import (
+    BoundedRepr, BytesFormatter, defaultBytesFormatter, defaultRepr)
+from .spans import NULL_SPAN, Span, SpanRecorder
+from .stats import RunningStats
 
 _absent = object()
 
@@ -52,6 +65,8 @@ def bindStaticVariable(name, value):
     return decorator
 
 
+# The lexer and formatter are shared by all threads. Neither is modified
+# after it's created, so that's safe without the GIL, too.
 @bindStaticVariable("formatter", Terminal256Formatter(style=SolarizedDark))
 @bindStaticVariable("lexer", Py3Lexer(ensurenl=False))
 def colorize(s):
@@ -69,7 +84,7 @@ def supportTerminalColorsInWindows():
 
 
 def stderrPrint(*args):
-    print(*args, file=sys.stderr)
+    writeRecord(" ".join(str(arg) for arg in args))
 
 
 def isLiteral(s):
@@ -81,9 +96,9 @@ def isLiteral(s):
 
 
 def colorizedStderrPrint(s):
-    colored = colorize(s)
-    with supportTerminalColorsInWindows():
-        stderrPrint(colored)
+    # Like stderrPrint(colorize(s)) within supportTerminalColorsInWindows(),
+    # but atomic, and without colorama.init()'s global side effects.
+    writeRecord(colorize(s), colored=True)
 
 
 DEFAULT_PREFIX = "ic| "
@@ -91,7 +106,10 @@ DEFAULT_LINE_WRAP_WIDTH = 70  # Characters.
 DEFAULT_CONTEXT_DELIMITER = "- "
 DEFAULT_OUTPUT_FUNCTION = colorizedStderrPrint
 #DEFAULT_ARG_TO_STRING_FUNCTION = pprint.pformat
-DEFAULT_ARG_TO_STRING_FUNCTION = repr
+# Like repr(), but output is bounded by the limits on defaultRepr. See
+# BoundedRepr.
+DEFAULT_ARG_TO_STRING_FUNCTION = defaultRepr.repr
+NUMERIC_TYPES = (int, float)
 
 
 """
@@ -116,19 +134,110 @@ NO_SOURCE_AVAILABLE_WARNING_MESSAGE = (
 )
 
 
+def warnNoSource(callFrame):
+    # Attributed to, and deduplicated per, the ic() call's line, like
+    # warnings.warn(stacklevel=...) would but from any depth.
+    frameGlobals = callFrame.f_globals
+    warnings.warn_explicit(
+        NO_SOURCE_AVAILABLE_WARNING_MESSAGE, RuntimeWarning,
+        callFrame.f_code.co_filename, callFrame.f_lineno,
+        module=frameGlobals.get('__name__'),
+        registry=frameGlobals.setdefault('__warningregistry__', {}))
+
+
 def callOrValue(obj):
     return obj() if callable(obj) else obj
 
 
+def passthrough(args):
+    if not args:  # E.g. ic().
+        return None
+    elif len(args) == 1:  # E.g. ic(1).
+        return args[0]
+    else:  # E.g. ic(1, 2, 3).
+        return args
+
+
 class Source(executing.Source):
     def get_text_with_indentation(self, node):
-        result = self.asttokens().get_text(node)
+        result = self.get_segment(node)
+        if result is None:
+            # No end positions. Tokenize the whole file with asttokens.
+            result = self.asttokens().get_text(node)
+            startColumn = node.first_token.start[1]
+        else:
+            startColumn = len(self.lines[node.lineno - 1].encode("utf8")[
+                :node.col_offset].decode("utf8", "replace"))
         if "\n" in result:
-            result = " " * node.first_token.start[1] + result
+            result = " " * startColumn + result
             result = dedent(result)
         result = result.strip()
         return result
 
+    def get_segment(self, node):
+        """
+        The source text of <node>, sliced from the file's lines with the
+        node's start and end positions, or None if it has no end position.
+        Unlike asttokens, this needs nothing but the AST that executing
+        already built. Column offsets are UTF-8 byte offsets.
+        """
+        endLineno = getattr(node, "end_lineno", None)
+        endColumn = getattr(node, "end_col_offset", None)
+        if endLineno is None or endColumn is None:
+            return None
+
+        lines = [
+            line.encode("utf8")
+            for line in self.lines[node.lineno - 1:endLineno]]
+        if not lines:
+            return None
+        if len(lines) == 1:
+            segment = lines[0][node.col_offset:endColumn]
+        else:
+            segment = b"\n".join(
+                [lines[0][node.col_offset:]] + lines[1:-1] +
+                [lines[-1][:endColumn]])
+        return segment.decode("utf8")
+
+
+# Parsed sources are kept for at most this many files, of at most this
+# many estimated bytes in total. A source's AST and line index take about
+# SOURCE_BYTES_PER_CHAR bytes per character of source.
+DEFAULT_MAX_SOURCES = 64
+DEFAULT_MAX_SOURCE_BYTES = 16 * 1024 * 1024
+SOURCE_BYTES_PER_CHAR = 40
+
+
+def sourceSize(source):
+    return len(source.text) * SOURCE_BYTES_PER_CHAR
+
+
+def forgetSource(key, source):
+    # executing also memoizes per Source instance, and per AST node, in
+    # unbounded functools caches that would keep evicted sources alive.
+    # Those caches are module-level, shared by every user of executing in
+    # the process, like IPython and stack_data, and can only be cleared
+    # whole. So each eviction also costs them their memos, which they then
+    # recompute. That's the price of bounding icecream's memory; evictions
+    # only happen once ic() is called from more source than sourceCache's
+    # budget holds.
+    for cached in (executing.Source.statements_at_line,
+                   getattr(executing.executing, 'statement_containing_node',
+                           None)):
+        cacheClear = getattr(cached, 'cache_clear', None)
+        if cacheClear is not None:
+            cacheClear()
+
+
+# Replace executing's unbounded caches, which are per class so only affect
+# icecream's Source. Its cache of analyzed call sites is redundant with
+# callSiteCache, and the only one that would hold on to code objects.
+sourceCache = LRUCache(
+    DEFAULT_MAX_SOURCES, DEFAULT_MAX_SOURCE_BYTES, sizeof=sourceSize,
+    onEvict=forgetSource)
+setattr(Source, '__source_cache_with_lines', sourceCache)
+setattr(Source, '__executing_cache', NullCache())
+
 
 def prefixLines(prefix, s, startAtLine=0):
     #eprint(f"{s=}")
@@ -172,28 +281,261 @@ def formatPair(prefix, arg, value):
 
 
 def singledispatch(func):
-    func = functools.singledispatch(func)
+    """
+    functools.singledispatch() plus unregister() and a table of formatters
+    looked up by exact type before dispatching. See setFastPaths().
+    """
+    default = func
+    dispatcher = functools.singledispatch(func)
 
     # add unregister based on https://stackoverflow.com/a/25951784
-    closure = dict(zip(func.register.__code__.co_freevars, func.register.__closure__))
+    closure = dict(zip(dispatcher.register.__code__.co_freevars, dispatcher.register.__closure__))
     registry = closure["registry"].cell_contents
     dispatch_cache = closure["dispatch_cache"].cell_contents
 
+    # Registration is serialized by <lock>. <fastPaths> is copy-on-write:
+    # it's replaced, never modified, so calls, which don't lock, always see
+    # a complete table, even without the GIL.
+    lock = threading.RLock()
+    defaultFastPaths = {}
+    fastPaths = {}
+
+    def afterForkInChild():
+        nonlocal lock
+        lock = threading.RLock()
+
+    atFork(afterInChild=afterForkInChild)
+
+    def syncFastPaths():
+        # A fast path is only used while <default> is what singledispatch
+        # would dispatch to. Otherwise the registered implementation is used.
+        nonlocal fastPaths
+        newFastPaths = {}
+        for cls, fastPath in defaultFastPaths.items():
+            impl = dispatcher.dispatch(cls)
+            newFastPaths[cls] = fastPath if impl is default else impl
+        fastPaths = newFastPaths
+
+    def setFastPaths(formatters):
+        """
+        <formatters> maps types to functions that return exactly what
+        <default> returns for instances of those types, only faster.
+        """
+        with lock:
+            defaultFastPaths.clear()
+            defaultFastPaths.update(formatters)
+            syncFastPaths()
+
+    def register(cls, func=None):
+        with lock:
+            result = dispatcher.register(cls, func)
+            if func is None and result is not cls:  # E.g. @register(int).
+                def decorator(f):
+                    with lock:
+                        f = result(f)
+                        syncFastPaths()
+                    return f
+                return decorator
+            syncFastPaths()
+            return result
+
     def unregister(cls):
-        del registry[cls]
-        dispatch_cache.clear()
+        with lock:
+            del registry[cls]
+            dispatch_cache.clear()
+            syncFastPaths()
+
+    @functools.wraps(dispatcher)
+    def wrapper(obj):
+        fastPath = fastPaths.get(type(obj))
+        if fastPath is not None:
+            return fastPath(obj)
+        return dispatcher(obj)
+
+    wrapper.register = register
+    wrapper.unregister = unregister
+    wrapper.setFastPaths = setFastPaths
+    return wrapper
+
 
-    func.unregister = unregister
-    return func
+# Formatters for NumPy and pandas types are registered the first time
+# one of their objects is formatted, so icecream never imports them. pop()
+# is atomic, so each is registered once even with concurrent first calls.
+lazyRegistrations = dict(LAZY_REGISTRATIONS)
 
 
 @singledispatch
 def argumentToString(obj):
+    if lazyRegistrations:
+        module = type(obj).__module__.partition(".")[0]
+        register = lazyRegistrations.pop(module, None)
+        if register is not None:
+            register(argumentToString)
+            return argumentToString(obj)
+
     s = DEFAULT_ARG_TO_STRING_FUNCTION(obj)
     s = s.replace("\\n", "\n")  # Preserve string newlines in output.
     return s
 
 
+@argumentToString.register(dict)
+@argumentToString.register(list)
+@argumentToString.register(tuple)
+@argumentToString.register(set)
+@argumentToString.register(frozenset)
+def containerToString(obj):
+    # Formatted by BoundedRepr's iterative, cycle-safe engine.
+    s = defaultRepr.repr(obj)
+    s = s.replace("\\n", "\n")  # Preserve string newlines in output.
+    return s
+
+
+@argumentToString.register(bytes)
+@argumentToString.register(bytearray)
+@argumentToString.register(memoryview)
+def bytesToString(obj):
+    s = defaultBytesFormatter.format(obj)
+    if "\n" not in s:  # Short enough to be output like repr().
+        s = s.replace("\\n", "\n")  # Preserve string newlines in output.
+    return s
+
+
+# Nearly all ic() arguments are scalars. These skip singledispatch and
+# return exactly what argumentToString() otherwise would.
+def scalarToString(obj):
+    return defaultRepr.truncate(repr(obj))
+
+
+def strToString(obj):
+    s = defaultRepr.reprString(obj)
+    s = s.replace("\\n", "\n")  # Preserve string newlines in output.
+    return s
+
+
+argumentToString.setFastPaths({
+    int: scalarToString,
+    float: scalarToString,
+    bool: scalarToString,
+    type(None): scalarToString,
+    str: strToString,
+})
+
+
+class AggregateSite:
+    """
+    Running statistics for each argument of one ic() call site in
+    aggregate mode. Updates from concurrent calls at the site are
+    serialized by <lock>.
+    """
+    __slots__ = ('context', 'argStrs', 'stats', 'lock')
+
+    def __init__(self, context, argStrs):
+        self.context = context
+        self.argStrs = argStrs
+        self.stats = [RunningStats() for _ in argStrs]
+        self.lock = threading.Lock()
+
+
+def isNumeric(obj):
+    if type(obj) in NUMERIC_TYPES:
+        return True
+    return isinstance(obj, numbers.Real) and not isinstance(obj, bool)
+
+
+def compileContext(contextFormat, contextFields, contextAbsPath):
+    # contextFields are appended to contextFormat, space separated.
+    template = contextFormat + "".join(
+        " {%s}" % name for name in contextFields)
+    return ContextTemplate(template, contextAbsPath)
+
+
+def compileFilter(include, exclude):
+    callFilter = CallFilter(include, exclude)
+    return callFilter if callFilter else None
+
+
+def checkSampleEvery(sampleEvery):
+    if not isinstance(sampleEvery, int) or sampleEvery < 1:
+        raise ValueError(
+            "sampleEvery must be a positive int, not %r" % sampleEvery)
+
+
+# Settings that ic.scope() can override. Aggregation can't be scoped; its
+# statistics and summaries are per process.
+SCOPED_SETTINGS = (
+    "enabled", "prefix", "outputFunction", "argToStringFunction",
+    "includeContext", "contextAbsPath", "contextFields", "contextFormat",
+    "include", "exclude", "sampleEvery")
+# Read by ic() calls, but not scoped.
+UNSCOPED_SETTINGS = (
+    "aggregate", "contextDelimiter", "lineWrapWidth", "_pairDelimiter")
+
+
+def changesSettings(method):
+    # Scopes' merged settings are refreshed after <method> changes the
+    # debugger's, even if it raises part way.
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._configVersion += 1
+    return wrapper
+
+
+class MergedConfig:
+    """
+    The settings of ic() calls in an ic.scope(), with the same attribute
+    names as IceCreamDebugger's.
+    """
+
+
+class ScopedConfig:
+    """
+    An ic.scope()'s <overrides> of <debugger>'s settings. They're merged
+    into a MergedConfig once, and again only after the debugger's settings
+    change, so looking them up on every call is O(1).
+    """
+    __slots__ = ("debugger", "overrides", "version", "merged")
+
+    def __init__(self, debugger, overrides):
+        self.debugger = debugger
+        self.overrides = overrides
+        self.version = None
+        self.merged = None
+
+    def get(self):
+        debugger = self.debugger
+        version = debugger._configVersion
+        if self.version != version:
+            # Concurrent merges, e.g. by threads that share a context, are
+            # identical, and each replaces the whole MergedConfig.
+            self.merged = self._merge()
+            self.version = version
+        return self.merged
+
+    def _merge(self):
+        debugger, overrides = self.debugger, self.overrides
+        merged = MergedConfig()
+        for name in SCOPED_SETTINGS + UNSCOPED_SETTINGS:
+            setattr(merged, name, getattr(debugger, name))
+        for name, value in overrides.items():
+            setattr(merged, name, value)
+
+        if any(name in overrides for name in (
+                "contextFormat", "contextFields", "contextAbsPath")):
+            merged._contextTemplate = compileContext(
+                merged.contextFormat, merged.contextFields,
+                merged.contextAbsPath)
+        else:
+            merged._contextTemplate = debugger._contextTemplate
+        if "include" in overrides or "exclude" in overrides:
+            merged._callFilter = compileFilter(merged.include, merged.exclude)
+        else:
+            merged._callFilter = debugger._callFilter
+        return merged
+
+
 class IceCreamDebugger:
     _pairDelimiter = ", "  # Used by the tests in tests/.
     lineWrapWidth = DEFAULT_LINE_WRAP_WIDTH
@@ -206,76 +548,181 @@ class IceCreamDebugger:
         argToStringFunction=argumentToString,
         includeContext=False,
         contextAbsPath=False,
+        aggregate=False,
+        aggregateInterval=None,
+        include=None,
+        exclude=None,
+        sampleEvery=1,
+        contextFields=(),
+        contextFormat=DEFAULT_CONTEXT_FORMAT,
     ):
+        # Incremented whenever settings change, to refresh scopes' merged
+        # settings. See ScopedConfig.
+        self._configVersion = 0
+        # The innermost ic.scope() of the current thread or asyncio task.
+        self._scope = contextvars.ContextVar("icecream.scope", default=None)
         self.enabled = True
+        self.sampleEvery = sampleEvery
+        self._sampleCount = 0
+        self._hitCounts = {}
+        self._droppedBySampling = 0
+        self._droppedByFilter = 0
         self.prefix = prefix
         self.includeContext = includeContext
         self.outputFunction = outputFunction
         self.argToStringFunction = argToStringFunction
         self.contextAbsPath = contextAbsPath
+        self.aggregateInterval = aggregateInterval
+        self._aggregates = {}
+        self._nextSummary = None
+        self._atexitRegistered = False
+        self.aggregate = False
+        if aggregate:
+            self._enableAggregation()
+        self._setFilter(include, exclude)
+        self.contextFields = tuple(contextFields)
+        self.contextFormat = contextFormat
+        self._compileContext()
+        self._spanRecorder = SpanRecorder()
+        atFork(afterInChild=self._afterForkInChild)
 
     def __call__(self, *args):
-        if self.enabled:
+        scope = self._scope.get()
+        config = self if scope is None else scope.get()
+        if config.enabled and (
+                config.sampleEvery == 1 or self._sample(config.sampleEvery)):
             callFrame = inspect.currentframe().f_back
-            self.outputFunction(self._format(callFrame, *args))
+            callFilter = config._callFilter
+            if callFilter is None or callFilter.allows(callFrame):
+                self._countHit(callFrame)
+                if not (config.aggregate and
+                        self._aggregate(callFrame, args)):
+                    config.outputFunction(
+                        self._format(callFrame, *args, config=config))
+            else:
+                self._droppedByFilter += 1
+
+        return passthrough(args)
+
+    def _callSite(self, sites, siteId, *args):
+        """
+        Entry point for ic() calls rewritten by icecream.specializeCalls().
+        sites[siteId] holds the call's argument source texts and which
+        arguments are literals, both computed at import time. So, unlike
+        __call__(), the call's source never has to be found or parsed.
+        """
+        scope = self._scope.get()
+        config = self if scope is None else scope.get()
+        if config.enabled and (
+                config.sampleEvery == 1 or self._sample(config.sampleEvery)):
+            argTexts, literals = sites[siteId]
+            argStrs = [
+                _absent if literal else text
+                for text, literal in zip(argTexts, literals)]
+            callFrame = sys._getframe(1)
+            callFilter = config._callFilter
+            if callFilter is None or callFilter.allows(callFrame):
+                self._countHit(callFrame)
+                if not (config.aggregate and
+                        self._aggregate(callFrame, args, argStrs)):
+                    config.outputFunction(self._format(
+                        callFrame, *args, argStrs=argStrs, config=config))
+            else:
+                self._droppedByFilter += 1
+
+        return passthrough(args)
 
-        if not args:  # E.g. ic().
-            passthrough = None
-        elif len(args) == 1:  # E.g. ic(1).
-            passthrough = args[0]
-        else:  # E.g. ic(1, 2, 3).
-            passthrough = args
+    def _sample(self, sampleEvery):
+        # Unlocked, so concurrent calls can miscount. That only makes
+        # sampling a touch less regular.
+        count = self._sampleCount = self._sampleCount + 1
+        if count % sampleEvery:
+            self._droppedBySampling += 1
+            return False
+        return True
 
-        return passthrough
+    def _countHit(self, callFrame):
+        # Unlocked, like _sample(), so concurrent hits can be undercounted.
+        key = (callFrame.f_code.co_filename, callFrame.f_lineno)
+        hitCounts = self._hitCounts
+        hitCounts[key] = hitCounts.get(key, 0) + 1
 
     def format(self, *args):
         callFrame = inspect.currentframe().f_back
         out = self._format(callFrame, *args)
         return out
 
-    def _format(self, callFrame, *args):
-        prefix = callOrValue(self.prefix)
+    def _format(self, callFrame, *args, argStrs=None, config=None):
+        if config is None:
+            scope = self._scope.get()
+            config = self if scope is None else scope.get()
+        prefix = callOrValue(config.prefix)
 
-        context = self._formatContext(callFrame)
-        #eprint(f"{self.includeContext=}")
+        #eprint(f"{config.includeContext=}")
         if not args:
+            context = config._contextTemplate.render(callFrame)
             time = self._formatTime()
             out = prefix + context + time
         else:
-            if not self.includeContext:
-                context = ""
-            out = self._formatArgs(callFrame, prefix, context, args)
+            context = (config._contextTemplate.render(callFrame)
+                       if config.includeContext else "")
+            out = self._formatArgs(
+                callFrame, prefix, context, args, argStrs, config)
 
         return out
 
-    def _formatArgs(self, callFrame, prefix, context, args):
+    def _getArgStrs(self, callFrame):
+        """
+        The source texts of the arguments of <callFrame>'s ic() call, with
+        _absent for those that can't be determined. Call sites are only
+        analyzed, and warned about, once. Failures are cached, too.
+        """
+        argStrs = callSiteCache.get(callFrame)
+        if argStrs is MISSING:
+            argStrs = self._analyzeArgStrs(callFrame)
+            if argStrs is None:
+                # No source, e.g. in a REPL. Fall back to the bytecode.
+                argStrs = argStrsFromBytecode(
+                    callFrame.f_code, callFrame.f_lasti)
+                if argStrs is None or None in argStrs:
+                    warnNoSource(callFrame)
+            callSiteCache.set(callFrame, argStrs)
+        if argStrs is None:
+            return None
+        return [_absent if arg is None else arg for arg in argStrs]
+
+    def _analyzeArgStrs(self, callFrame):
         callNode = Source.executing(callFrame).node
-        if callNode is not None:
-            source = Source.for_frame(callFrame)
-            sanitizedArgStrs = [
-                source.get_text_with_indentation(arg) for arg in callNode.args
-            ]
-        else:
-            warnings.warn(
-                NO_SOURCE_AVAILABLE_WARNING_MESSAGE,
-                category=RuntimeWarning,
-                stacklevel=4,
-            )
+        if callNode is None:
+            return None
+        source = Source.for_frame(callFrame)
+        return [source.get_text_with_indentation(arg) for arg in callNode.args]
+
+    def _formatArgs(
+            self, callFrame, prefix, context, args, argStrs=None, config=None):
+        sanitizedArgStrs = argStrs
+        if sanitizedArgStrs is None:
+            sanitizedArgStrs = self._getArgStrs(callFrame)
+        if sanitizedArgStrs is None or len(sanitizedArgStrs) != len(args):
             sanitizedArgStrs = [_absent] * len(args)
 
         pairs = list(zip(sanitizedArgStrs, args))
         #eprint(f"{pairs=}")
 
-        out = self._constructArgumentOutput(prefix, context, pairs)
+        out = self._constructArgumentOutput(
+            prefix, context, pairs, self if config is None else config)
         #eprint(f"{out=}")
         return out
 
-    def _constructArgumentOutput(self, prefix, context, pairs):
+    def _constructArgumentOutput(self, prefix, context, pairs, config=None):
+        if config is None:
+            config = self
+
         def argPrefix(arg):
             return "%s: " % arg
 
         #eprint(f"{pairs=}")
-        pairs = [(arg, self.argToStringFunction(val)) for arg, val in pairs]
+        pairs = [(arg, config.argToStringFunction(val)) for arg, val in pairs]
 
         # For cleaner output, if <arg> is a literal, eg 3, "a string",
         # b'bytes', etc, only output the value, not the argument and the
@@ -295,13 +742,13 @@ class IceCreamDebugger:
             for arg, val in pairs
         ]
 
-        allArgsOnOneLine = self._pairDelimiter.join(pairStrs)
+        allArgsOnOneLine = config._pairDelimiter.join(pairStrs)
         multilineArgs = len(allArgsOnOneLine.splitlines()) > 1
         multilineArgs = False
 
-        contextDelimiter = self.contextDelimiter if context else ""
+        contextDelimiter = config.contextDelimiter if context else ""
         allPairs = prefix + context + contextDelimiter + allArgsOnOneLine
-        #firstLineTooLong = len(allPairs.splitlines()[0]) > self.lineWrapWidth
+        #firstLineTooLong = len(allPairs.splitlines()[0]) > config.lineWrapWidth
         firstLineTooLong = False
         #eprint(f"{multilineArgs=}")
 
@@ -335,40 +782,164 @@ class IceCreamDebugger:
         return "\n".join(lines)
 
     def _formatContext(self, callFrame):
-        call_path_string, filename, lineNumber, parentFunction = self._getContext(callFrame)
+        scope = self._scope.get()
+        config = self if scope is None else scope.get()
+        return config._contextTemplate.render(callFrame)
 
+    def _aggregate(self, callFrame, args, argStrs=None):
+        # Only calls whose arguments are all numbers are aggregated. Anything
+        # else, like ic() or ic('foo'), is output as usual.
+        if not args:
+            return False
+        for arg in args:
+            if not isNumeric(arg):
+                return False
+        try:
+            # Before any stats are updated, so a value that doesn't fit a
+            # float, like 2**1100, is output as usual rather than raise out
+            # of ic() or leave the stats half updated.
+            values = [float(arg) for arg in args]
+        except (OverflowError, TypeError, ValueError):
+            return False
+
+        key = (callFrame.f_code, callFrame.f_lasti, len(args))
+        site = self._aggregates.get(key)
+        if site is None:
+            # setdefault(), so concurrent first calls share one site.
+            site = self._aggregates.setdefault(
+                key, self._newAggregateSite(callFrame, len(args), argStrs))
+
+        with site.lock:
+            for stats, value in zip(site.stats, values):
+                stats.add(value)
+
+        if self._nextSummary is not None:
+            now = time.monotonic()
+            if now >= self._nextSummary:
+                self._nextSummary = now + self.aggregateInterval
+                self.summarize()
+
+        return True
+
+    def _newAggregateSite(self, callFrame, numArgs, argStrs=None):
+        code = callFrame.f_code
+        parentFunction = code.co_name
         if parentFunction != "<module>":
             parentFunction = "%s()" % parentFunction
-
-        #context = "%s:%s in %s" % (filename, lineNumber, parentFunction)
-        #eprint("\n" + call_path_string + "\n")
-
-        timestamp = str("%.3f" % time.time())
-        context = "%s %s %s" % (timestamp, os.getpid(), call_path_string)
-        #return call_path_string
-        return context
+        filepath = (realpath if self.contextAbsPath else basename)(
+            code.co_filename)
+        context = "%s:%s in %s" % (filepath, callFrame.f_lineno, parentFunction)
+
+        if argStrs is None:
+            argStrs = self._getArgStrs(callFrame)
+        if argStrs is None or len(argStrs) != numArgs:
+            argStrs = [_absent] * numArgs
+        return AggregateSite(context, argStrs)
+
+    def summarize(self):
+        """
+        Output one summary line per argument for every call site seen in
+        aggregate mode, like
+
+          ic| loop.py:12 in foo()- x: n=1000 min=0 max=9 mean=4.5 ...
+        """
+        prefix = callOrValue(self.prefix)
+        for site in list(self._aggregates.values()):
+            for arg, stats in zip(site.argStrs, site.stats):
+                with site.lock:
+                    summary = stats.summary()
+                if arg is not _absent and not isLiteral(arg):
+                    summary = "%s: %s" % (arg, summary)
+                self.outputFunction(
+                    prefix + site.context + self.contextDelimiter + summary)
+
+    def _enableAggregation(self):
+        self.aggregate = True
+        if self.aggregateInterval:
+            self._nextSummary = time.monotonic() + self.aggregateInterval
+        else:
+            self._nextSummary = None
+        if not self._atexitRegistered:
+            atexit.register(self._summarizeAtExit)
+            self._atexitRegistered = True
+
+    def _afterForkInChild(self):
+        # The parent summarizes what it aggregated. A forked child only
+        # summarizes its own calls, so none are output twice.
+        self._aggregates = {}
+        if self.aggregate:
+            self._enableAggregation()
+
+    def _summarizeAtExit(self):
+        if self.aggregate and self._aggregates:
+            self.summarize()
 
     def _formatTime(self):
-        now = datetime.now()
-        formatted = now.strftime("%H:%M:%S.%f")[:-3]
-        return " at %s" % formatted
+        return " at %s" % clockTime(None)
 
-    def _getContext(self, callFrame):
-        frameInfo = inspect.getframeinfo(callFrame)
-        lineNumber = frameInfo.lineno
-        parentFunction = frameInfo.function
+    def _setFilter(self, include, exclude):
+        self._callFilter = compileFilter(include, exclude)
+        self.include = include
+        self.exclude = exclude
 
-        filepath = (realpath if self.contextAbsPath else basename)(frameInfo.filename)
-        call_path_string = build_call_path(callFrame)
-        #eprint("\n" + call_path_string + "\n")
-        return call_path_string, filepath, lineNumber, parentFunction
+    def _compileContext(self):
+        self._contextTemplate = compileContext(
+            self.contextFormat, self.contextFields, self.contextAbsPath)
 
+    @changesSettings
     def enable(self):
         self.enabled = True
 
+    @changesSettings
     def disable(self):
         self.enabled = False
 
+    @contextmanager
+    def scope(
+        self,
+        enabled=_absent,
+        prefix=_absent,
+        outputFunction=_absent,
+        argToStringFunction=_absent,
+        includeContext=_absent,
+        contextAbsPath=_absent,
+        contextFields=_absent,
+        contextFormat=_absent,
+        include=_absent,
+        exclude=_absent,
+        sampleEvery=_absent,
+    ):
+        """
+        Override settings, like configureOutput() would, but only for ic()
+        calls in the with block, and only in the current thread or asyncio
+        task, and the tasks it creates, like
+
+          with ic.scope(includeContext=True, prefix='req-42| '):
+              await handle(request)
+
+        Scopes nest. Settings they don't override follow the debugger's,
+        as set by configureOutput(), enable(), and disable().
+        """
+        overrides = {
+            k: v for k, v in locals().items()
+            if k != "self" and v is not _absent}
+        if "sampleEvery" in overrides:
+            checkSampleEvery(sampleEvery)
+        if "contextFields" in overrides:
+            overrides["contextFields"] = tuple(contextFields)
+
+        outer = self._scope.get()
+        if outer is not None:
+            overrides = dict(outer.overrides, **overrides)
+        scoped = ScopedConfig(self, overrides)
+        scoped.get()  # Raises ValueError now for, e.g., unknown fields.
+        token = self._scope.set(scoped)
+        try:
+            yield self
+        finally:
+            self._scope.reset(token)
+
+    @changesSettings
     def configureOutput(
         self,
         prefix=_absent,
@@ -376,6 +947,13 @@ class IceCreamDebugger:
         argToStringFunction=_absent,
         includeContext=_absent,
         contextAbsPath=_absent,
+        aggregate=_absent,
+        aggregateInterval=_absent,
+        include=_absent,
+        exclude=_absent,
+        sampleEvery=_absent,
+        contextFields=_absent,
+        contextFormat=_absent,
     ):
         noParameterProvided = all(
             v is _absent for k, v in locals().items() if k != "self"
@@ -395,8 +973,191 @@ class IceCreamDebugger:
         if includeContext is not _absent:
             self.includeContext = includeContext
 
-        if contextAbsPath is not _absent:
-            self.contextAbsPath = contextAbsPath
+        if aggregateInterval is not _absent:
+            self.aggregateInterval = aggregateInterval
 
+        if aggregate is not _absent:
+            if aggregate:
+                self._enableAggregation()
+            else:
+                self.aggregate = False
+        elif aggregateInterval is not _absent and self.aggregate:
+            self._enableAggregation()
+
+        if sampleEvery is not _absent:
+            checkSampleEvery(sampleEvery)
+            self.sampleEvery = sampleEvery
+
+        if (contextFormat is not _absent or contextFields is not _absent
+                or contextAbsPath is not _absent):
+            # An unknown field raises ValueError and leaves the config as
+            # it was.
+            previous = (
+                self.contextFormat, self.contextFields, self.contextAbsPath)
+            if contextFormat is not _absent:
+                self.contextFormat = contextFormat
+            if contextFields is not _absent:
+                self.contextFields = tuple(contextFields)
+            if contextAbsPath is not _absent:
+                self.contextAbsPath = contextAbsPath
+            try:
+                self._compileContext()
+            except ValueError:
+                (self.contextFormat, self.contextFields,
+                 self.contextAbsPath) = previous
+                raise
+
+        if include is not _absent or exclude is not _absent:
+            self._setFilter(
+                self.include if include is _absent else include,
+                self.exclude if exclude is _absent else exclude)
+
+    def span(self, name=None):
+        """
+        A context manager that records the time its with block takes as a
+        span named <name>, by default the calling function's name, like
+
+          with ic.span('load'):
+              rows = load()
+
+        Spans are tagged with their call site and, if ic() includes
+        context, the context. They're only recorded while ic() is enabled.
+        See exportTrace().
+        """
+        return self._span(name, sys._getframe(1))
+
+    def timed(self, func=None, name=None):
+        """
+        A decorator that records a span, named <name> or the function's
+        qualified name, for every call of the decorated function, like
+
+          @ic.timed
+          def load(): ...
+
+          @ic.timed(name='fetch')
+          async def fetch(url): ...
+        """
+        if isinstance(func, str):  # E.g. @ic.timed('fetch').
+            func, name = None, func
+        if func is None:
+            return functools.partial(self.timed, name=name)
+        spanName = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self._span(spanName, sys._getframe(1)):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self._span(spanName, sys._getframe(1)):
+                    return func(*args, **kwargs)
+        return wrapper
+
+    def _span(self, name, callFrame):
+        scope = self._scope.get()
+        config = self if scope is None else scope.get()
+        if not config.enabled:
+            return NULL_SPAN
+        code = callFrame.f_code
+        context = (config._contextTemplate.render(callFrame)
+                   if config.includeContext else None)
+        return Span(
+            self._spanRecorder.recorder(), name or code.co_name, code,
+            callFrame.f_lineno, context)
+
+    def traceEvents(self):
+        """
+        The spans recorded by span() and @timed, as a dict of Chrome trace
+        events, like
+
+          {'traceEvents': [{'name': 'load', 'ph': 'X', 'ts': 1043.2,
+                            'dur': 3012.8, 'tid': 7021, ...}, ...],
+           'displayTimeUnit': 'ms'}
+        """
+        return self._spanRecorder.traceEvents()
+
+    def exportTrace(self, file):
+        """
+        Write the recorded spans, as Chrome trace event JSON, to <file>, a
+        path or a file object. Open it in chrome://tracing or Perfetto.
+        """
+        self._spanRecorder.exportTrace(file)
+
+    def clearSpans(self):
+        self._spanRecorder.clear()
+
+    def callStats(self):
+        """
+        How many calls to ic() were output, or aggregated, per call site,
+        and how many were dropped by sampling or by filters, like
+
+          {'hits': {('/app/views.py', 12): 1000, ...},
+           'dropped': {'sampling': 9000, 'filter': 0}}
+
+        Calls while ic() is disabled aren't counted.
+        """
+        return {
+            'hits': dict(self._hitCounts),
+            'dropped': {
+                'sampling': self._droppedBySampling,
+                'filter': self._droppedByFilter,
+            },
+        }
+
+    def cacheStats(self):
+        """
+        Size, budget, and hit rate of the caches of parsed sources and of
+        resolved call sites, like
+
+          {'sources': {'entries': 3, 'bytes': 2841720, 'hitRate': 0.5, ...},
+           'callSites': {'hits': 998, 'misses': 2, 'files': {...}, ...}}
+
+        Source sizes are estimates of their memory use.
+        """
+        return {
+            'sources': sourceCache.stats(),
+            'callSites': callSiteCache.stats(),
+        }
+
+    def configureCaches(
+        self,
+        maxSources=_absent,
+        maxSourceBytes=_absent,
+        maxFiles=_absent,
+        maxDynamicSites=_absent,
+        persistentCallSites=_absent,
+    ):
+        """
+        Set the budgets of the caches reported by cacheStats(). None lifts a
+        limit. Least recently used entries over budget are evicted.
 
-ic = IceCreamDebugger()
+        <persistentCallSites> sets whether resolved call sites are read from
+        and written to .icecream files in __pycache__, like bytecode.
+        """
+        noParameterProvided = all(
+            v is _absent for k, v in locals().items() if k != "self"
+        )
+        if noParameterProvided:
+            raise TypeError("configureCaches() missing at least one argument")
+
+        if maxSources is not _absent or maxSourceBytes is not _absent:
+            sourceCache.resize(
+                sourceCache.maxEntries if maxSources is _absent
+                else maxSources,
+                sourceCache.maxBytes if maxSourceBytes is _absent
+                else maxSourceBytes)
+
+        files, dynamic = callSiteCache.files, callSiteCache.dynamic
+        if maxFiles is not _absent:
+            files.resize(maxFiles, files.maxBytes)
+        if maxDynamicSites is not _absent:
+            dynamic.resize(maxDynamicSites, dynamic.maxBytes)
+        if persistentCallSites is not _absent:
+            callSiteCache.persistent = bool(persistentCallSites)
+
+
+ic = IceCreamDebugger(
+    include=os.environ.get(INCLUDE_ENV_VAR),
+    exclude=os.environ.get(EXCLUDE_ENV_VAR))
@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+Import hooks that rewrite ic() calls in selected packages as they're
+imported. For example, to leave ic() calls in code that ships but pay
+nothing for them, not even evaluating ic()'s call, in production:
+
+  import icecream
+  icecream.stripCalls(['myapp'])
+
+  import myapp  # ic(x) is now just x throughout myapp.
+
+Or, to analyze every ic() call's source once, at import time, instead of
+on every call, use icecream.specializeCalls(['myapp']).
+
+Rewritten code is cached in __pycache__ next to, but separate from,
+regular bytecode, so the rewrite is only paid once per source change.
+
+Frozen applications don't import from source, so there's nothing for an
+import hook to rewrite. For those, writeStrippedCalls() and
+writeSpecializedCalls(), or python -m icecream strip|specialize, rewrite
+ahead of time instead, into .pyc files for the freezer to collect.
+"""
+
+import argparse
+import ast
+import hashlib
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import marshal
+import os
+import struct
+import sys
+from textwrap import dedent
+
+from .caches import writeAtomically
+from .icecream import isLiteral
+
+
+DEFAULT_NAMES = ('ic',)
+
+# Bump whenever a rewrite changes, to invalidate previously cached code.
+REWRITE_VERSION = 2
+
+# The module global that holds the call site table of specialized modules.
+CALL_SITES_NAME = '__icecream_call_sites__'
+
+
+def isIcCall(node, names):
+    """
+    Whether <node> is a call, like ic(a, b), to one of <names> that can be
+    rewritten: no keyword or starred arguments.
+    """
+    return (
+        isinstance(node, ast.Call) and
+        isinstance(node.func, ast.Name) and node.func.id in names and
+        not node.keywords and
+        not any(isinstance(arg, ast.Starred) for arg in node.args))
+
+
+class Rewriter(ast.NodeTransformer):
+    def rewrite(self, tree, source, path):
+        """
+        Rewrite the module <tree>, parsed from the str <source> read from
+        <path>.
+        """
+        return self.visit(tree)
+
+
+class CallStripper(Rewriter):
+    """
+    Rewrites ic() calls to their return value, sans the call:
+
+      ic()      ->  None
+      ic(x)     ->  x
+      ic(a, b)  ->  (a, b)
+    """
+    def __init__(self, names=DEFAULT_NAMES):
+        self.names = frozenset(names)
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if not isIcCall(node, self.names):
+            return node
+
+        if not node.args:
+            replacement = ast.Constant(value=None)
+        elif len(node.args) == 1:
+            return node.args[0]
+        else:
+            replacement = ast.Tuple(elts=node.args, ctx=ast.Load())
+        return ast.copy_location(replacement, node)
+
+
+class CallSpecializer(Rewriter):
+    """
+    Rewrites ic() calls as calls to ic._callSite(), and adds a table,
+    __icecream_call_sites__, to the module with what ic() otherwise
+    determines at runtime by finding and parsing each call's source:
+
+      ic(a, 'b')  ->  ic._callSite(__icecream_call_sites__, 0, a, 'b')
+
+    where __icecream_call_sites__[0] is
+
+      (('a', "'b'"), (False, True))
+
+    that is the arguments' source texts and which arguments are literals.
+    The call's filename, line number, and function come from its frame, as
+    usual.
+    """
+    def __init__(self, names=DEFAULT_NAMES):
+        self.names = frozenset(names)
+
+    def rewrite(self, tree, source, path):
+        # Modules can be imported concurrently, so each gets its own state.
+        return CallSpecializer(self.names)._rewrite(tree, source, path)
+
+    def _rewrite(self, tree, source, path):
+        self.source = source
+        self.sites = []
+        tree = self.visit(tree)
+        if self.sites:
+            table = ast.Assign(
+                targets=[ast.Name(id=CALL_SITES_NAME, ctx=ast.Store())],
+                value=ast.Constant(value=tuple(self.sites)))
+            tree.body.insert(moduleHeaderLength(tree), table)
+        return tree
+
+    def visit_Call(self, node):
+        if not isIcCall(node, self.names):
+            self.generic_visit(node)
+            return node
+
+        argTexts = tuple(self.argText(arg) for arg in node.args)
+        literals = tuple(text is None or isLiteral(text) for text in argTexts)
+        siteId = len(self.sites)
+        self.sites.append((tuple(text or '' for text in argTexts), literals))
+
+        self.generic_visit(node)
+        method = ast.Attribute(value=node.func, attr='_callSite', ctx=ast.Load())
+        sites = ast.Name(id=CALL_SITES_NAME, ctx=ast.Load())
+        call = ast.Call(
+            func=method, args=[sites, ast.Constant(value=siteId)] + node.args,
+            keywords=[])
+        return ast.copy_location(call, node)
+
+    def argText(self, node):
+        # Like Source.get_text_with_indentation().
+        text = ast.get_source_segment(self.source, node, padded=True)
+        if text is None:
+            return None
+        if '\n' in text:
+            text = dedent(text)
+        return text.strip()
+
+
+def moduleHeaderLength(tree):
+    """
+    The number of statements at the start of <tree>, its docstring and
+    __future__ imports, that must come before any other statement.
+    """
+    body = tree.body
+    i = 0
+    if (body and isinstance(body[0], ast.Expr) and
+            isinstance(body[0].value, ast.Constant) and
+            isinstance(body[0].value.value, str)):
+        i = 1
+    while (i < len(body) and isinstance(body[i], ast.ImportFrom) and
+           body[i].module == '__future__'):
+        i += 1
+    return i
+
+
+class RewritingLoader(importlib.machinery.SourceFileLoader):
+    """
+    Loads source files with <transformer> applied to their AST. The
+    rewritten code is cached in __pycache__/<module>.<tag>.pyc, validated
+    against the source's mtime and size like regular bytecode. <cacheTag>
+    differs per optimization level, like regular bytecode's opt- tags.
+    """
+    def __init__(self, fullname, path, transformer, cacheTag):
+        super().__init__(fullname, path)
+        self.transformer = transformer
+        self.cacheTag = cacheTag
+
+    def get_code(self, fullname):
+        sourcePath = self.get_filename(fullname)
+        stats = self.path_stats(sourcePath)
+        try:
+            cachePath = importlib.util.cache_from_source(
+                sourcePath, optimization=self.cacheTag)
+        except NotImplementedError:  # sys.implementation.cache_tag is None.
+            cachePath = None
+
+        code = loadCachedCode(cachePath, stats) if cachePath else None
+        if code is None:
+            code = self.source_to_code(self.get_data(sourcePath), sourcePath)
+            if cachePath and not sys.dont_write_bytecode:
+                writeCachedCode(cachePath, code, stats)
+        return code
+
+    def source_to_code(self, data, path, *, _optimize=-1):
+        return rewriteSource(data, path, self.transformer, _optimize)
+
+
+def rewriteSource(data, path, transformer, optimize=-1):
+    """
+    Compile the source bytes <data>, read from <path>, with <transformer>
+    applied to their AST.
+    """
+    source = importlib.util.decode_source(data)
+    tree = ast.parse(source, filename=path)
+    tree = transformer.rewrite(tree, source, path)
+    tree = ast.fix_missing_locations(tree)
+    return compile(tree, path, 'exec', dont_inherit=True, optimize=optimize)
+
+
+def packedStats(stats):
+    # Regular .pyc header: flags, then the source's mtime and size.
+    return struct.pack(
+        '<III', 0, int(stats['mtime']) & 0xFFFFFFFF,
+        stats['size'] & 0xFFFFFFFF)
+
+
+def loadCachedCode(cachePath, stats):
+    try:
+        with open(cachePath, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    header = importlib.util.MAGIC_NUMBER + packedStats(stats)
+    if not data.startswith(header):
+        return None
+    try:
+        return marshal.loads(data[len(header):])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def writeCachedCode(cachePath, code, stats):
+    writeAtomically(cachePath, (
+        importlib.util.MAGIC_NUMBER + packedStats(stats) +
+        marshal.dumps(code)))
+
+
+class RewritingFinder(importlib.abc.MetaPathFinder):
+    """
+    Finds modules in <packages>, and their subpackages, with the other
+    finders on sys.meta_path and loads those that are source files with a
+    RewritingLoader.
+    """
+    def __init__(self, packages, transformer, cacheTag):
+        self.packages = tuple(packages)
+        self.transformer = transformer
+        self.cacheTag = cacheTag
+
+    def matches(self, fullname):
+        return any(
+            fullname == package or fullname.startswith(package + '.')
+            for package in self.packages)
+
+    def find_spec(self, fullname, path, target=None):
+        if not self.matches(fullname):
+            return None
+
+        for finder in sys.meta_path:
+            # Only the first RewritingFinder that matches rewrites a module.
+            findSpec = getattr(finder, 'find_spec', None)
+            if isinstance(finder, RewritingFinder) or findSpec is None:
+                continue
+            spec = findSpec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if type(spec.loader) is not importlib.machinery.SourceFileLoader:
+            return None  # E.g. extension modules and .pyc-only modules.
+        spec.loader = RewritingLoader(
+            fullname, spec.origin, self.transformer, self.cacheTag)
+        return spec
+
+
+def cacheTag(kind, names):
+    # Like 'icstripa1b2c3d4'. Alphanumeric, as cache_from_source() requires.
+    # Rewritten code is compiled at the interpreter's optimization level, so
+    # code cached under -O, sans asserts, isn't loaded without -O, and vice
+    # versa.
+    key = '%s:%i:%i:%s' % (
+        kind, REWRITE_VERSION, sys.flags.optimize, ','.join(sorted(names)))
+    return 'ic%s%s' % (kind, hashlib.sha1(key.encode('utf8')).hexdigest()[:8])
+
+
+def installFinder(finder):
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+def stripCalls(packages, names=DEFAULT_NAMES):
+    """
+    Rewrite ic() calls as their return value, like ic(x) as x, in modules
+    of <packages> imported from now on. Only calls to the bare names in
+    <names> are rewritten; ic.format() and the like are left be. Returns
+    the import hook, which can be passed to removeImportHook().
+    """
+    finder = RewritingFinder(
+        packages, CallStripper(names), cacheTag('strip', names))
+    return installFinder(finder)
+
+
+def specializeCalls(packages, names=DEFAULT_NAMES):
+    """
+    Analyze the source of ic() calls in modules of <packages> imported from
+    now on once, at import time. Enabled ic() calls then never find or parse
+    their source at runtime. Only calls to the bare names in <names> are
+    specialized. Returns the import hook, which can be passed to
+    removeImportHook().
+    """
+    finder = RewritingFinder(
+        packages, CallSpecializer(names), cacheTag('specialize', names))
+    return installFinder(finder)
+
+
+def sourceFiles(package):
+    """
+    Yields (sourcePath, relativePath) for every .py file of the module or
+    package <package>, and its subpackages, where <relativePath> is like
+    ['myapp', 'sub', 'mod.py'].
+    """
+    spec = importlib.util.find_spec(package)
+    if spec is None:
+        raise ModuleNotFoundError('No module named %r' % package, name=package)
+    parts = package.split('.')
+
+    locations = spec.submodule_search_locations
+    if locations is None:
+        if not spec.origin or not spec.origin.endswith('.py'):
+            raise ValueError(
+                '%r has no .py source: %s' % (package, spec.origin))
+        yield spec.origin, parts[:-1] + [os.path.basename(spec.origin)]
+        return
+
+    for location in locations:
+        for dirpath, dirnames, filenames in os.walk(location):
+            dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+            relativeDir = os.path.relpath(dirpath, location)
+            subpackage = [] if relativeDir == os.curdir else (
+                relativeDir.split(os.sep))
+            for filename in sorted(filenames):
+                if filename.endswith('.py'):
+                    yield (
+                        os.path.join(dirpath, filename),
+                        parts + subpackage + [filename])
+
+
+def writeRewritten(packages, outputDir, transformer):
+    """
+    Rewrite every module of <packages>, and their subpackages, with
+    <transformer>, and write them under <outputDir> as sourceless
+    bytecode: myapp/sub/mod.py as <outputDir>/myapp/sub/mod.pyc. Returns
+    the paths written.
+    """
+    written = []
+    for package in packages:
+        for sourcePath, relativePath in sourceFiles(package):
+            with open(sourcePath, 'rb') as f:
+                data = f.read()
+            code = rewriteSource(data, sourcePath, transformer)
+
+            outputPath = os.path.join(outputDir, *relativePath) + 'c'
+            os.makedirs(os.path.dirname(outputPath), exist_ok=True)
+            stats = os.stat(sourcePath)
+            writeCachedCode(outputPath, code, {
+                'mtime': stats.st_mtime, 'size': stats.st_size})
+            written.append(outputPath)
+    return written
+
+
+def writeStrippedCalls(packages, outputDir, names=DEFAULT_NAMES):
+    """
+    Like stripCalls(), but ahead of time, for applications that don't
+    import from .py source, like those frozen by PyInstaller: the modules
+    of <packages> are rewritten and written to <outputDir> as sourceless
+    .pyc files, which are imported, and collected by freezers, like any
+    other module when <outputDir> comes first on the path. Returns the
+    paths written.
+    """
+    return writeRewritten(packages, outputDir, CallStripper(names))
+
+
+def writeSpecializedCalls(packages, outputDir, names=DEFAULT_NAMES):
+    """
+    Like specializeCalls(), but ahead of time. See writeStrippedCalls().
+    Specialized calls never need their source, so their output is complete
+    even where no source is shipped.
+    """
+    return writeRewritten(packages, outputDir, CallSpecializer(names))
+
+
+def rewriteCommand(kind, argv):
+    """
+    python -m icecream specialize|strip: writeSpecializedCalls() or
+    writeStrippedCalls() from the command line.
+    """
+    write = {
+        'specialize': writeSpecializedCalls, 'strip': writeStrippedCalls}[kind]
+    parser = argparse.ArgumentParser(
+        prog='python -m icecream ' + kind,
+        description=(
+            '%s ic() calls ahead of time, for frozen applications. The .pyc '
+            'files written are specific to this Python version.' % (
+                kind.capitalize())))
+    parser.add_argument(
+        'packages', nargs='+', help='Importable package or module names.')
+    parser.add_argument(
+        '-o', '--output', required=True,
+        help='Where to write .pyc files. Put it first on the path, e.g. with '
+             "PyInstaller's --paths.")
+    parser.add_argument(
+        '--names', default=','.join(DEFAULT_NAMES),
+        help='Comma-separated names of ic() to rewrite calls to.')
+    args = parser.parse_args(argv)
+
+    try:
+        written = write(
+            args.packages, args.output, tuple(args.names.split(',')))
+    except (ImportError, ValueError, SyntaxError, OSError) as e:
+        print('Failed to %s: %s' % (kind, e), file=sys.stderr)
+        return 1
+    print('Wrote %i modules to %s' % (len(written), args.output))
+    return 0
+
+
+def removeImportHook(finder):
+    """
+    Stop rewriting modules imported from now on. Modules that have already
+    been imported stay rewritten.
+    """
+    if finder in sys.meta_path:
+        sys.meta_path.remove(finder)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+Atomic writes of ic()'s output records, so concurrent threads never
+interleave partial lines.
+
+Each record is assembled, and ANSI-stripped where need be, in a staging
+buffer private to its thread. Only the final stream.write() of the whole
+record is under outputLock. Unlike colorama.init() and deinit(), which
+replace sys.stdout and sys.stderr and race when called from many threads,
+nothing global is modified.
+
+outputLock is held across os.fork(), with sys.stdout and sys.stderr
+flushed, so a forked child never inherits half of a record.
+"""
+
+import io
+import sys
+import threading
+
+from colorama.ansitowin32 import AnsiToWin32
+
+from .forks import atFork
+
+
+outputLock = threading.Lock()
+
+_staging = threading.local()
+
+
+def stagingBuffer():
+    buf = getattr(_staging, 'buf', None)
+    if buf is None:
+        buf = _staging.buf = io.StringIO()
+    else:
+        buf.seek(0)
+        buf.truncate()
+    return buf
+
+
+def writeRecord(record, stream=None, colored=False):
+    """
+    Write the str <record> and a newline to <stream>, sys.stderr by default,
+    with one write(). If <colored>, ANSI escape sequences in <record> are
+    stripped, or converted to Win32 calls, like colorama.init() would for
+    <stream>, e.g. stripped if it isn't a terminal.
+    """
+    if stream is None:
+        stream = sys.stderr
+    if stream is None:  # E.g. pythonw.exe.
+        return
+
+    converter = AnsiToWin32(stream) if colored else None
+    if converter is not None and converter.convert:
+        # Legacy Windows consoles need Win32 calls between the writes of
+        # the text in between escape sequences. Serialize all of them.
+        with outputLock:
+            converter.write(record + '\n')
+        return
+
+    buf = stagingBuffer()
+    if converter is not None and converter.strip:
+        AnsiToWin32(buf, convert=False, strip=True).write(record)
+    else:
+        buf.write(record)
+    buf.write('\n')
+    data = buf.getvalue()
+
+    with outputLock:
+        stream.write(data)
+        stream.flush()
+
+
+def beforeFork():
+    outputLock.acquire()
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:  # E.g. None under pythonw.exe, or closed.
+            pass
+
+
+def afterFork():
+    outputLock.release()
+
+
+def afterForkInChild():
+    global _staging
+    outputLock.release()
+    _staging = threading.local()
+
+
+atFork(before=beforeFork, afterInParent=afterFork,
+       afterInChild=afterForkInChild)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+Opt-in POSIX signal handlers to turn ic() output on and off, and dial its
+volume, in a running process without restarting it:
+
+  import icecream
+  icecream.installSignalHandlers()
+
+  $ kill -USR1 <pid>  # Toggles ic.enable()/ic.disable().
+  $ kill -USR2 <pid>  # Cycles ic's sampleEvery through 1, 10, 100, 1000.
+
+The handlers only change settings that ic() already reads on every call,
+so there's no locking, and no cost at all while ic() is disabled.
+"""
+
+import signal
+
+
+DEFAULT_SAMPLING_LEVELS = (1, 10, 100, 1000)
+
+
+class SignalHandlers:
+    def __init__(self, debugger, samplingLevels):
+        self.debugger = debugger
+        self.samplingLevels = tuple(samplingLevels)
+        self.previous = {}
+
+    def toggle(self, signum, frame):
+        if self.debugger.enabled:
+            self.debugger.disable()
+        else:
+            self.debugger.enable()
+
+    def cycleSampling(self, signum, frame):
+        # The next level after the current one, which might have been set
+        # some other way, like with configureOutput(sampleEvery=...).
+        levels = self.samplingLevels
+        current = self.debugger.sampleEvery
+        nextLevels = [level for level in levels if level > current]
+        self.debugger.configureOutput(
+            sampleEvery=nextLevels[0] if nextLevels else levels[0])
+
+    def install(self, toggleSignal, samplingSignal):
+        for signum, handler in ((toggleSignal, self.toggle),
+                                (samplingSignal, self.cycleSampling)):
+            if signum is not None:
+                self.previous[signum] = signal.signal(signum, handler)
+
+    def remove(self):
+        for signum, handler in self.previous.items():
+            signal.signal(signum, handler)
+        self.previous.clear()
+
+
+def installSignalHandlers(
+        debugger=None, toggleSignal=None, samplingSignal=None,
+        samplingLevels=DEFAULT_SAMPLING_LEVELS):
+    """
+    Toggle <debugger>, ic by default, on <toggleSignal>, SIGUSR1 by default,
+    and cycle its sampleEvery through <samplingLevels> on <samplingSignal>,
+    SIGUSR2 by default. Like signal.signal(), only works in the main thread.
+    Returns the handlers, which can be passed to removeSignalHandlers().
+    """
+    if not hasattr(signal, 'SIGUSR1'):
+        raise RuntimeError(
+            'SIGUSR1 and SIGUSR2 are unavailable on this platform.')
+    if debugger is None:
+        from .icecream import ic as debugger
+    if toggleSignal is None:
+        toggleSignal = signal.SIGUSR1
+    if samplingSignal is None:
+        samplingSignal = signal.SIGUSR2
+
+    handlers = SignalHandlers(debugger, samplingLevels)
+    handlers.install(toggleSignal, samplingSignal)
+    return handlers
+
+
+def removeSignalHandlers(handlers):
+    """
+    Restore the signal handlers that installSignalHandlers() replaced.
+    """
+    handlers.remove()
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+"""
+Timed spans of code, recorded by ic.span() and @ic.timed, and their export
+to the Chrome trace event format, for chrome://tracing or Perfetto:
+
+  with ic.span('load'):
+      data = load()
+
+  ic.exportTrace('trace.json')
+
+Recording doesn't lock. Each thread appends one tuple per span to a deque
+of its own, of at most <maxSpans> spans; the oldest are dropped first.
+Finished threads' deques are kept for export, but only their most recent
+<maxSpans> spans in total, so thread-per-request servers don't accumulate
+a deque per request. Spans nest by time, so Chrome draws spans within
+spans on the same thread as a stack.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from os.path import basename
+from time import perf_counter_ns
+
+from .context import threadIdentity
+from .forks import atFork
+
+
+DEFAULT_MAX_SPANS = 100000  # Per thread.
+
+
+class Span:
+    """
+    A context manager that records the time between its enter and exit,
+    as a span named <name>, with the call site <code> and <lineno> and,
+    if ic() includes context, its <context>, with record(), a buffer's
+    append().
+    """
+    __slots__ = ('record', 'name', 'code', 'lineno', 'context', 'start')
+
+    def __init__(self, record, name, code, lineno, context):
+        self.record = record
+        self.name = name
+        self.code = code
+        self.lineno = lineno
+        self.context = context
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.record((
+            self.name, self.start, perf_counter_ns(), self.code, self.lineno,
+            self.context))
+        return False
+
+
+class NullSpan:
+    """
+    What span() returns while ic() is disabled. Records nothing, and is
+    reused, so disabled spans cost next to nothing.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class SpanRecorder:
+    def __init__(self, maxSpans=DEFAULT_MAX_SPANS):
+        self.maxSpans = maxSpans
+        self.clear()
+        atFork(afterInChild=self.clear)
+
+    def recorder(self):
+        """
+        The append() of the current thread's buffer of spans, which only
+        it appends to.
+        """
+        try:
+            return self._local.record
+        except AttributeError:
+            pass
+        buffer = deque(maxlen=self.maxSpans)
+        name, nativeId = threadIdentity()
+        with self._lock:
+            self._retireFinishedThreads()
+            self._buffers.append(
+                (threading.current_thread(), name, nativeId, buffer))
+        record = self._local.record = buffer.append
+        return record
+
+    def clear(self):
+        # Threads that record again get new buffers. Also called in forked
+        # children, where another thread may have held the lock.
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # (thread, thread name, native id, buffer) for each live thread
+        # that's recorded spans.
+        self._buffers = []
+        # (thread name, native id, buffer) of finished threads, oldest
+        # first, holding <_retiredSpans> spans in total.
+        self._retired = deque()
+        self._retiredSpans = 0
+
+    def _retireFinishedThreads(self):
+        # Called with the lock held. Finished threads' buffers never grow
+        # again, so they're counted once, and the oldest are dropped whole.
+        live = []
+        for entry in self._buffers:
+            thread, name, nativeId, buffer = entry
+            if thread.is_alive():
+                live.append(entry)
+            else:
+                self._retired.append((name, nativeId, buffer))
+                self._retiredSpans += len(buffer)
+        self._buffers = live
+        while self._retiredSpans > self.maxSpans:
+            _, _, buffer = self._retired.popleft()
+            self._retiredSpans -= len(buffer)
+
+    def spans(self):
+        """
+        Every thread's recorded spans, as (thread name, native id, spans)
+        tuples, finished threads' first.
+        """
+        with self._lock:
+            self._retireFinishedThreads()
+            buffers = list(self._retired) + [
+                (name, nativeId, buffer)
+                for _, name, nativeId, buffer in self._buffers]
+        # deque.copy() is atomic, so threads can keep recording.
+        return [(name, nativeId, buffer.copy())
+                for name, nativeId, buffer in buffers]
+
+    def traceEvents(self):
+        """
+        The recorded spans in the Chrome trace event format, as a dict
+        ready for json.dump(). Times are in microseconds.
+        """
+        pid = os.getpid()
+        events = []
+        for threadName, nativeId, spans in self.spans():
+            tid = int(nativeId)
+            events.append({
+                'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                'args': {'name': threadName}})
+            for name, start, end, code, lineno, context in spans:
+                args = {
+                    'file': basename(code.co_filename),
+                    'line': lineno,
+                    'func': code.co_name,
+                }
+                if context is not None:
+                    args['context'] = context
+                events.append({
+                    'name': name, 'cat': 'icecream', 'ph': 'X',
+                    'ts': start / 1000, 'dur': (end - start) / 1000,
+                    'pid': pid, 'tid': tid, 'args': args})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def exportTrace(self, file):
+        """
+        Write the recorded spans' trace events, as JSON, to <file>, a path
+        or a file object.
+        """
+        trace = self.traceEvents()
+        if hasattr(file, 'write'):
+            json.dump(trace, file)
+        else:
+            with open(file, 'w') as f:
+                json.dump(trace, f)
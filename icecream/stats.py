@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import math
+
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+# Quantiles of up to this many values are exact. P-Square's five markers
+# only approximate tail quantiles, like p99, well after many more values
+# than five.
+EXACT_QUANTILE_VALUES = 200
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate with the P-Square algorithm of Jain and
+    Chlamtac. Five markers are kept regardless of how many values are
+    observed, so each add() is O(1) time and memory. Until more than
+    EXACT_QUANTILE_VALUES values are observed, they're kept, too, and the
+    quantile is exact.
+    """
+    __slots__ = ('p', 'count', 'values', 'heights', 'positions', 'desired',
+                 'increments')
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.values = []
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        values = self.values
+        if values is not None:
+            if len(values) < EXACT_QUANTILE_VALUES:
+                values.append(x)
+            else:
+                self.values = None  # Enough for the markers from now on.
+
+        q = self.heights
+        if self.count < 5:
+            q.append(x)
+            self.count += 1
+            if self.count == 5:
+                q.sort()
+            return
+        self.count += 1
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = self.desired
+        increments = self.increments
+        for i in range(5):
+            desired[i] += increments[i]
+
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if ((d >= 1 and n[i + 1] - n[i] > 1) or
+                    (d <= -1 and n[i - 1] - n[i] < -1)):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        if not self.count:
+            return math.nan
+        if self.values is not None:
+            # Too few values for the markers; use the nearest rank.
+            ordered = sorted(self.values)
+            index = int(round(self.p * (len(ordered) - 1)))
+            return ordered[index]
+        return self.heights[2]
+
+
+class RunningStats:
+    """
+    Count, min, max, mean, and variance (with Welford's online algorithm)
+    plus approximate quantiles of a stream of numbers.
+    """
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max', 'quantiles')
+
+    def __init__(self, quantiles=DEFAULT_QUANTILES):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.quantiles = [P2Quantile(p) for p in quantiles]
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        for quantile in self.quantiles:
+            quantile.add(x)
+
+    @property
+    def variance(self):
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+    def summary(self):
+        # n=1000 min=0 max=9 mean=4.5 std=2.87 p50=4.5 p90=8.1 p99=8.9
+        fields = [
+            ('n', self.count), ('min', self.min), ('max', self.max),
+            ('mean', self.mean), ('std', self.stddev)]
+        fields += [
+            ('p%s' % formatNumber(q.p * 100), q.value())
+            for q in self.quantiles]
+        return ' '.join('%s=%s' % (k, formatNumber(v)) for k, v in fields)
+
+
+def formatNumber(x):
+    if isinstance(x, int):
+        return str(x)
+    if math.isfinite(x) and x == int(x) and abs(x) < 1e15:
+        return str(int(x))
+    return '%.6g' % x
@@ -79,6 +79,7 @@ setup(
     platforms=['any'],
     packages=find_packages(exclude=["tests", "tests.*"]),
     include_package_data=True,
+    python_requires='>=3.8',
     classifiers=[
         'License :: OSI Approved :: MIT License',
         'Natural Language :: English',
@@ -87,8 +88,6 @@ setup(
         'Development Status :: 4 - Beta',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
-        'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
         'Programming Language :: Python :: 3.10',
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+from os.path import dirname, join as pjoin
+
+from icecream import IceCreamDebugger, serveAdmin, stopAdmin
+from icecream.admin import sendCommand
+
+
+REPO_DIR = dirname(dirname(os.path.abspath(__file__)))
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Requires Unix sockets.')
+class TestAdmin(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = pjoin(self.tmpdir, 'admin.sock')
+        self.output = []
+        self.ic = IceCreamDebugger(outputFunction=self.output.append)
+        self.server = serveAdmin(self.path, self.ic)
+
+    def tearDown(self):
+        stopAdmin(self.server)
+        shutil.rmtree(self.tmpdir)
+
+    def send(self, command):
+        response = sendCommand(self.path, command)
+        assert response['ok'], response
+        return response['result']
+
+    def testSocketIsPrivate(self):
+        assert os.stat(self.path).st_mode & 0o777 == 0o600
+        # Nothing is left behind from binding it privately.
+        assert os.listdir(self.tmpdir) == ['admin.sock']
+
+    def testSocketIsRemovedAtExit(self):
+        path = pjoin(self.tmpdir, 'exit.sock')
+        code = 'import icecream; icecream.serveAdmin(%r)' % path
+        subprocess.check_call(
+            [sys.executable, '-c', code],
+            env=dict(os.environ, PYTHONPATH=REPO_DIR))
+        assert not os.path.exists(path)
+
+    def testStatsAndHits(self):
+        for i in range(3):
+            self.ic(i)
+        self.ic.configureOutput(sampleEvery=2)
+        self.ic(3)
+        self.ic(4)
+
+        stats = self.send('stats')
+        assert stats['hits'] == 4
+        assert stats['callSites'] == 2
+        assert stats['dropped'] == {'sampling': 1, 'filter': 0}
+        assert 'sources' in stats['caches']
+        assert stats['config']['sampleEvery'] == 2
+
+        hits = self.send('hits')
+        assert [site['hits'] for site in hits] == [3, 1]
+        assert hits[0]['file'] == __file__
+
+    def testSet(self):
+        assert self.send('set enabled false')['enabled'] is False
+        assert not self.ic.enabled
+        self.send('set enabled true')
+
+        self.send('set prefix debug| ')
+        self.send('set includeContext true')
+        self.send('set sampleEvery 10')
+        self.send('set exclude ["func:*testSet"]')
+        assert self.send('config') == {
+            'enabled': True, 'prefix': 'debug| ', 'includeContext': True,
+            'sampleEvery': 10, 'include': None,
+            'exclude': ['func:*testSet']}
+
+        self.ic.configureOutput(sampleEvery=1)
+        self.ic(1)
+        assert self.output == []
+        assert self.ic.callStats()['dropped']['filter'] == 1
+
+    def testErrors(self):
+        for command in ('nope', 'set nope 1', 'set sampleEvery 0', ''):
+            response = sendCommand(self.path, command)
+            assert not response['ok'] and response['error']
+
+    def testCtl(self):
+        self.ic(1)
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'icecream', 'ctl', self.path, 'hits'],
+            env=dict(os.environ, PYTHONPATH=REPO_DIR))
+        assert json.loads(output.decode('utf8'))[0]['hits'] == 1
+
+        result = subprocess.run(
+            [sys.executable, '-m', 'icecream', 'ctl', self.path, 'nope'],
+            env=dict(os.environ, PYTHONPATH=REPO_DIR), capture_output=True)
+        assert result.returncode == 1
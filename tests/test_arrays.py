@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import subprocess
+import sys
+import unittest
+
+from icecream import argumentToString
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+class TestArrays(unittest.TestCase):
+    def testImportingIcecreamDoesNotImportNumpy(self):
+        code = 'import sys, icecream; assert "numpy" not in sys.modules'
+        subprocess.check_call([sys.executable, '-c', code])
+
+    @unittest.skipIf(np is None, 'NumPy is not installed.')
+    def testSmallNdarrayUsesRepr(self):
+        x = np.zeros((1, 2))
+        assert argumentToString(x) == repr(x)
+
+    @unittest.skipIf(np is None, 'NumPy is not installed.')
+    def testLargeNdarrayIsSummarized(self):
+        x = np.arange(10000, dtype=float).reshape(100, 100)
+        x[0, 0] = np.nan
+        s = argumentToString(x)
+        summary, preview = s.split('\n', 1)
+        assert summary == (
+            'ndarray(shape=(100, 100), dtype=float64, size=78.1 KiB, '
+            'min=1, max=9999, mean=5000, nan=1)')
+        assert '...' in preview and len(preview) < 1000
+        assert np.ndarray in argumentToString.registry
+
+    @unittest.skipIf(np is None, 'NumPy is not installed.')
+    def testLargeMaskedArrayIsSummarized(self):
+        x = np.ma.masked_greater(np.arange(3000.0).reshape(1000, 3), 2500.0)
+        x.data[-1, -1] = np.inf  # Under the mask, so never shown.
+        s = argumentToString(x)
+        summary, preview = s.split('\n', 1)
+        assert summary == (
+            'MaskedArray(shape=(1000, 3), dtype=float64, size=23.4 KiB, '
+            'min=0, max=2500, mean=1250, nan=0, masked=499)')
+        assert '--' in preview and 'inf' not in preview
+
+    @unittest.skipIf(pd is None, 'pandas is not installed.')
+    def testLargeDataFrameAndSeriesAreSummarized(self):
+        df = pd.DataFrame({'a': range(2000), 'b': ['x'] * 2000})
+        s = argumentToString(df)
+        assert s.startswith('DataFrame(shape=(2000, 2), dtypes=')
+        assert 'nan=0)' in s.splitlines()[0]
+        assert len(s.splitlines()) < 20
+
+        s = argumentToString(df['a'] * 2.0)
+        assert s.startswith(
+            "Series(name='a', length=2000, dtype=float64, size=")
+        assert 'min=0, max=3998, mean=1999, nan=0' in s
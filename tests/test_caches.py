@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import unittest
+
+from icecream.caches import LRUCache, NullCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def testEvictsLeastRecentlyUsedEntries(self):
+        evicted = []
+        cache = LRUCache(2, onEvict=lambda k, v: evicted.append((k, v)))
+        cache['a'] = 1
+        cache['b'] = 2
+        assert cache['a'] == 1  # Now 'b' is the least recently used.
+        cache['c'] = 3
+
+        assert 'b' not in cache
+        assert cache.get('a') == 1 and cache.get('c') == 3
+        assert evicted == [('b', 2)]
+
+    def testHitsDontLock(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+        lock, cache.lock = cache.lock, None  # Locking would raise.
+        assert cache['a'] == 1 and cache.get('a') == 1
+        cache.lock = lock
+
+        # Used entries get a second chance, at most once each, so a full
+        # cache of used entries still evicts.
+        cache['b'] = 2
+        cache.get('b')
+        cache['c'] = 3
+        assert list(cache.entries) == ['b', 'c']
+        assert cache.get('a') is None
+
+        cache.resize(0)  # Used or not, every entry goes.
+        assert len(cache) == 0
+
+    def testByteBudget(self):
+        cache = LRUCache(maxBytes=10, sizeof=len)
+        cache['a'] = 'x' * 4
+        cache['b'] = 'x' * 4
+        cache['c'] = 'x' * 4
+        assert list(cache.entries) == ['b', 'c']
+        assert cache.bytes == 8
+
+        # An entry over budget by itself is still kept, alone.
+        cache['d'] = 'x' * 20
+        assert list(cache.entries) == ['d']
+        assert cache.bytes == 20
+
+        cache['d'] = 'x'  # Replacing an entry replaces its size, too.
+        assert cache.bytes == 1
+
+    def testResize(self):
+        cache = LRUCache()
+        for i in range(10):
+            cache[i] = i
+        cache.resize(maxEntries=3)
+        assert list(cache.entries) == [7, 8, 9]
+
+    def testStats(self):
+        cache = LRUCache(1)
+        assert cache.stats()['hitRate'] is None
+        cache['a'] = 1
+        cache.get('a')
+        cache.get('b')
+        cache['b'] = 2
+
+        stats = cache.stats()
+        assert stats['entries'] == 1
+        assert stats['hits'] == 1 and stats['misses'] == 1
+        assert stats['hitRate'] == 0.5
+        assert stats['evictions'] == 1
+        assert stats['bytes'] is None
+
+    def testNullCache(self):
+        cache = NullCache()
+        cache['a'] = 1
+        assert cache.get('a') is None
+        assert 'a' not in cache
+        with self.assertRaises(KeyError):
+            cache['a']
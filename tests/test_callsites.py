@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import importlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import weakref
+from os.path import dirname, join as pjoin
+from types import SimpleNamespace
+from unittest import mock
+
+from icecream.callsites import (
+    MISSING, CallSiteCache, argStrsFromBytecode, cachePathFor, callSiteCache)
+
+
+MODULE_SOURCE = '''
+from icecream import ic
+
+def f(x):
+    return ic.format(x)
+'''
+
+SCRIPT = '''
+import sys
+sys.dont_write_bytecode = False
+sys.path.insert(0, %r)
+import icecream.icecream
+if %r:
+    def fail(*args, **kwargs):
+        raise AssertionError('Source.executing() was called.')
+    icecream.icecream.Source.executing = fail
+import icmod
+print(icmod.f(3))
+'''
+
+REPO_DIR = dirname(dirname(os.path.abspath(__file__)))
+
+
+class TestCallSiteCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.modulePath = pjoin(self.tmpdir, 'icmod.py')
+        with open(self.modulePath, 'w') as f:
+            f.write(MODULE_SOURCE)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def runScript(self, failOnAnalysis):
+        env = dict(os.environ, PYTHONPATH=REPO_DIR)
+        return subprocess.check_output(
+            [sys.executable, '-c', SCRIPT % (self.tmpdir, failOnAnalysis)],
+            env=env, universal_newlines=True)
+
+    def testCallSitesArePersistedAcrossProcesses(self):
+        out = self.runScript(failOnAnalysis=False)
+        assert out.strip() == 'ic| x: 3'
+        assert os.path.exists(cachePathFor(self.modulePath))
+
+        # The second process reads the call site from disk, so it doesn't
+        # need to analyze icmod.py's source.
+        assert self.runScript(failOnAnalysis=True) == out
+
+    def testChangedSourceInvalidatesPersistedCallSites(self):
+        self.runScript(failOnAnalysis=False)
+        with open(self.modulePath, 'a') as f:
+            f.write('\n# Changed.\n')
+
+        with self.assertRaises(subprocess.CalledProcessError):
+            with open(os.devnull, 'w') as devnull:
+                env = dict(os.environ, PYTHONPATH=REPO_DIR)
+                subprocess.check_call(
+                    [sys.executable, '-c', SCRIPT % (self.tmpdir, True)],
+                    env=env, stderr=devnull)
+
+    def testPersistenceCanBeTurnedOff(self):
+        env = dict(
+            os.environ, PYTHONPATH=REPO_DIR, ICECREAM_PERSIST_CALL_SITES='0')
+        out = subprocess.check_output(
+            [sys.executable, '-c', SCRIPT % (self.tmpdir, False)],
+            env=env, universal_newlines=True)
+        assert out.strip() == 'ic| x: 3'
+        assert not os.path.exists(cachePathFor(self.modulePath))
+
+    def testInMemory(self):
+        cache = CallSiteCache(persistent=False)
+        frame = SimpleNamespace(f_code=sys._getframe().f_code, f_lasti=10)
+        assert cache.get(frame) is MISSING
+        cache.set(frame, ['a', 'b'])
+        assert cache.get(frame) == ('a', 'b')
+
+    def moduleFrame(self):
+        code = compile('', self.modulePath, 'exec')
+        return SimpleNamespace(f_code=code, f_lasti=0)
+
+    def editModule(self):
+        with open(self.modulePath, 'a') as f:
+            f.write('\n# Edited.\n')
+
+    def testEditedFilesAreReanalyzed(self):
+        cache = CallSiteCache(persistent=False, statInterval=0)
+        frame = self.moduleFrame()
+        assert cache.get(frame) is MISSING
+        cache.set(frame, ['x'])
+        assert cache.get(frame) == ('x',)
+
+        self.editModule()
+        assert cache.get(frame) is MISSING
+
+    def testFilesAreStatdAtMostOncePerInterval(self):
+        cache = CallSiteCache(persistent=False, statInterval=3600)
+        frame = self.moduleFrame()
+        cache.get(frame)
+        cache.set(frame, ['x'])
+
+        self.editModule()
+        with mock.patch('icecream.callsites.os.stat') as stat:
+            for _ in range(3):
+                assert cache.get(frame) == ('x',)
+        assert stat.call_count == 0
+
+    def testReloadedModulesAreReanalyzed(self):
+        sys.path.insert(0, self.tmpdir)
+        try:
+            import icmod
+            with mock.patch.object(sys, 'dont_write_bytecode', True):
+                icmod.f(3)
+                assert self.modulePath in callSiteCache.files
+                importlib.reload(icmod)
+            assert self.modulePath not in callSiteCache.files
+        finally:
+            sys.path.remove(self.tmpdir)
+            sys.modules.pop('icmod', None)
+
+    def testCodeWithoutAFileIsCachedPerCodeObject(self):
+        cache = CallSiteCache(persistent=False)
+        code = compile('f(x)', '<stdin>', 'eval')
+        frame = SimpleNamespace(f_code=code, f_lasti=10)
+        assert cache.get(frame) is MISSING
+        cache.set(frame, None)  # Failures are cached, too.
+        assert cache.get(frame) is None
+
+        other = compile('f(y)', '<stdin>', 'eval')
+        assert cache.get(SimpleNamespace(f_code=other, f_lasti=10)) is MISSING
+
+    def testCodeWithoutAFileIsntKeptAlive(self):
+        cache = CallSiteCache(persistent=False)
+        code = compile('f(z)', '<stdin>', 'eval')
+        cache.set(SimpleNamespace(f_code=code, f_lasti=10), ('z',))
+        ref = weakref.ref(code)
+        del code
+        assert ref() is None
+
+    def testEvictedFilesAreWrittenToDisk(self):
+        cache = CallSiteCache(maxFiles=1)
+        frame = SimpleNamespace(f_code=sys._getframe().f_code, f_lasti=10)
+        other = SimpleNamespace(
+            f_code=compile('', self.modulePath, 'exec'), f_lasti=0)
+        with mock.patch('icecream.callsites.writeCacheFile') as write, \
+                mock.patch.object(sys, 'dont_write_bytecode', False):
+            assert cache.get(frame) is MISSING
+            cache.set(frame, ['a'])
+            cache.get(other)  # Evicts this file's entry.
+
+        assert write.call_count == 1
+        assert len(cache.files) == 1
+
+
+def bytecodeArgStrs(source):
+    """
+    argStrsFromBytecode() of the call to f() in <source>, at the bytecode
+    offset f() sees as its caller's f_lasti.
+    """
+    result = []
+
+    def f(*args):
+        caller = sys._getframe(1)
+        result.append(argStrsFromBytecode(caller.f_code, caller.f_lasti))
+
+    namespace = {'f': f, 'd': {'k': [1]}, 'o': SimpleNamespace(x=2), 'y': 0}
+    exec(compile(source, '<stdin>', 'exec'), namespace)
+    return result[0]
+
+
+class TestArgStrsFromBytecode(unittest.TestCase):
+    def testSimpleExpressions(self):
+        self.assertEqual(
+            bytecodeArgStrs('f(d["k"][0], o.x, 3, d)'),
+            ["d['k'][0]", 'o.x', '3', 'd'])
+
+    def testLocals(self):
+        source = 'def g(a, b):\n    f(a, b.x)\ng(1, o)'
+        self.assertEqual(bytecodeArgStrs(source), ['a', 'b.x'])
+
+    def testOtherExpressionsAreUnknown(self):
+        self.assertEqual(bytecodeArgStrs('f(len(d), y)'), [None, 'y'])
+        self.assertEqual(bytecodeArgStrs('f(y + 1)'), [None])
+        self.assertEqual(bytecodeArgStrs('f()'), [])
+
+    def testBranchesMakeEarlierArgumentsUnknown(self):
+        self.assertEqual(
+            bytecodeArgStrs('f(y, o.x or d, y)'), [None, None, 'y'])
+        # Some versions compile the call into each branch, so the branch's
+        # argument is a plain name or attribute.
+        self.assertEqual(bytecodeArgStrs('f(d if y else o)'), [None])
+        self.assertEqual(
+            bytecodeArgStrs('f(d[0] if y else o.x, y)'), [None, 'y'])
+        self.assertEqual(
+            bytecodeArgStrs('f(y, d if y else o, y)'), [None, None, 'y'])
+
+    def testNotACall(self):
+        self.assertIsNone(bytecodeArgStrs('f(*[1])'))
+
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import asyncio
+import contextvars
+import os
+import re
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+from icecream import IceCreamDebugger, addContextField, removeContextField
+from icecream import context
+from icecream.context import DEFAULT_CONTEXT_FORMAT, NO_VALUE
+
+
+requestId = contextvars.ContextVar('requestId')
+
+
+class TestContextFields(unittest.TestCase):
+    def setUp(self):
+        self.output = []
+        self.ic = IceCreamDebugger(
+            outputFunction=self.output.append, includeContext=True)
+
+    def tearDown(self):
+        removeContextField('request')
+        removeContextField('calls')
+
+    def context(self):
+        # The context is the first line of output, before the delimiter.
+        return self.output[-1].split(self.ic.contextDelimiter)[0]
+
+    def testThread(self):
+        self.ic.configureOutput(contextFields=['thread', 'tid'])
+
+        def run():
+            self.ic(1)
+
+        thread = threading.Thread(target=run, name='worker-7')
+        thread.start()
+        thread.join()
+        assert self.context().endswith(
+            ' worker-7 %i' % thread.native_id), self.context()
+
+    def testTask(self):
+        self.ic.configureOutput(contextFields=['task'])
+        self.ic(1)
+        assert self.context().endswith(' ' + NO_VALUE)
+
+        async def main():
+            self.ic(1)
+
+        async def run():
+            await asyncio.create_task(main(), name='fetcher')
+
+        asyncio.run(run())
+        assert self.context().endswith(' fetcher')
+
+    def testContextVar(self):
+        addContextField('request', requestId)
+        self.ic.configureOutput(contextFields=['request'])
+        self.ic(1)
+        assert self.context().endswith(' ' + NO_VALUE)
+
+        token = requestId.set('r-123')
+        try:
+            self.ic(1)
+        finally:
+            requestId.reset(token)
+        assert self.context().endswith(' r-123')
+
+    def testFieldsAreOnlyComputedWhenIncluded(self):
+        calls = []
+        addContextField('calls', lambda: calls.append(1))
+        self.ic.configureOutput(includeContext=False, contextFields=['calls'])
+        self.ic(1)
+        assert calls == []
+
+        self.ic.configureOutput(includeContext=True)
+        self.ic(1)
+        assert calls == [1]
+
+    def testUnknownAndBuiltinFields(self):
+        with self.assertRaises(ValueError):
+            self.ic.configureOutput(contextFields=['nope'])
+        with self.assertRaises(ValueError):
+            addContextField('thread', requestId)
+        with self.assertRaises(TypeError):
+            addContextField('request', 'notCallable')
+
+
+class TestContextFormat(unittest.TestCase):
+    def setUp(self):
+        self.output = []
+        self.ic = IceCreamDebugger(
+            outputFunction=self.output.append, includeContext=True)
+
+    def tearDown(self):
+        removeContextField('calls')
+
+    def context(self):
+        return self.output[-1].split(self.ic.contextDelimiter)[0]
+
+    def testTemplate(self):
+        self.ic.configureOutput(
+            prefix='', contextFormat='{file}:{line} in {func} 100%')
+        self.ic(1)
+        line = sys._getframe().f_lineno - 1
+        assert self.context() == (
+            'test_context.py:%i in testTemplate() 100%%' % line), (
+            self.context())
+
+    def testFormatSpec(self):
+        self.ic.configureOutput(prefix='', contextFormat='[{pid:>10}]')
+        self.ic(1)
+        assert self.context() == '[%10i]' % os.getpid()
+
+    def testContextFieldsAreAppended(self):
+        self.ic.configureOutput(
+            prefix='', contextFormat='{pid}', contextFields=['tid'])
+        self.ic(1)
+        assert self.context() == '%i %i' % (
+            os.getpid(), threading.get_native_id())
+
+    def testOnlyReferencedFieldsAreComputed(self):
+        calls = []
+        addContextField('calls', lambda: calls.append(1))
+        with mock.patch('icecream.context.build_call_path') as callPath:
+            self.ic.configureOutput(contextFormat='{pid} {calls}')
+            self.ic(1)
+        assert calls == [1]
+        callPath.assert_not_called()
+
+    def testUnknownField(self):
+        for template in ('{nope}', '{}', '{0}'):
+            with self.assertRaises(ValueError):
+                self.ic.configureOutput(contextFormat=template)
+        # The config is unchanged.
+        assert self.ic.contextFormat == DEFAULT_CONTEXT_FORMAT
+
+
+class TestTimeAndPidFields(unittest.TestCase):
+    def testTimestamp(self):
+        before = time.time()
+        ts = context.timestamp(None)
+        after = time.time()
+        assert re.match(r'^\d+\.\d{3}$', ts), ts
+        # Milliseconds are truncated, not rounded.
+        assert before - 0.001 <= float(ts) <= after
+
+    def testClockTime(self):
+        assert re.match(r'^\d\d:\d\d:\d\d\.\d{3}$', context.clockTime(None))
+
+    def testElapsed(self):
+        first = float(context.elapsed(None))
+        time.sleep(0.002)
+        assert float(context.elapsed(None)) > first
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'Requires os.fork().')
+    def testPidIsRefreshedAfterFork(self):
+        assert context.pid(None) == str(os.getpid())
+        read, write = os.pipe()
+        child = os.fork()
+        if child == 0:  # pragma: no cover
+            os.write(write, context.pid(None).encode())
+            os._exit(0)
+        os.close(write)
+        with os.fdopen(read) as f:
+            childPid = f.read()
+        os.waitpid(child, 0)
+        assert childPid == str(child)
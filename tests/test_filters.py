@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import os
+import subprocess
+import sys
+import unittest
+from os.path import dirname
+from types import SimpleNamespace
+
+from icecream.filters import CallFilter, parsePatterns
+
+
+REPO_DIR = dirname(dirname(os.path.abspath(__file__)))
+
+
+def fakeFrame(module, filename='/app/billing/views.py', function='view'):
+    # The code of a real function, so its name and, on Python 3.11+,
+    # qualified name are both <function>.
+    outer = compile('def %s(): pass' % function, filename, 'exec')
+    code = next(c for c in outer.co_consts if hasattr(c, 'co_code'))
+    return SimpleNamespace(f_code=code, f_globals={'__name__': module})
+
+
+class TestCallFilter(unittest.TestCase):
+    def testParsePatterns(self):
+        regexes = parsePatterns(' myapp.*, file:*.py,func:view ,')
+        assert sorted(regexes) == ['file', 'function', 'module']
+        assert regexes['module'].match('myapp.billing')
+        assert not regexes['module'].match('other')
+        assert parsePatterns(None) == parsePatterns([]) == {}
+
+    def testIncludeAndExclude(self):
+        callFilter = CallFilter(
+            include='myapp.billing.*', exclude='func:*_internal')
+        assert callFilter.allows(fakeFrame('myapp.billing.views'))
+        assert not callFilter.allows(fakeFrame('myapp.users'))
+        assert not callFilter.allows(
+            fakeFrame('myapp.billing.views', function='charge_internal'))
+
+        callFilter = CallFilter(exclude='file:/app/billing/*')
+        assert not callFilter.allows(fakeFrame('myapp.billing.views'))
+        assert callFilter.allows(fakeFrame('x', filename='/app/users.py'))
+
+    def testNoPatternsIsFalsy(self):
+        assert not CallFilter()
+        assert not CallFilter(include='', exclude=' , ')
+        assert CallFilter(exclude='x')
+
+    def testDecisionsAreCachedPerCodeObject(self):
+        callFilter = CallFilter(include='myapp.*')
+        frame = fakeFrame('myapp.views')
+        assert callFilter.allows(frame)
+        frame.f_globals['__name__'] = 'other'  # Not reevaluated.
+        assert callFilter.allows(frame)
+        assert list(callFilter.decisions) == [id(frame.f_code)]
+
+        # Equal code objects, e.g. of identical functions in two files, are
+        # still told apart.
+        assert not callFilter.allows(fakeFrame('other'))
+
+    def testEnvironmentVariables(self):
+        script = (
+            'from icecream import ic\n'
+            'ic(1)\n'
+            'def quiet():\n'
+            '    ic(2)\n'
+            'quiet()\n')
+        env = dict(
+            os.environ, PYTHONPATH=REPO_DIR, ICECREAM_EXCLUDE='func:quiet')
+        output = subprocess.check_output(
+            [sys.executable, '-c', script], env=env,
+            stderr=subprocess.STDOUT).decode('utf8')
+        assert '1' in output and '2' not in output
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+from collections import Counter
+
+from icecream import IceCreamDebugger, serveAdmin, stopAdmin
+from icecream.admin import defaultSocketPath, sendCommand
+from icecream.output import writeRecord
+
+
+LINE_RE = re.compile(r"^ic\| token: '([PC]-\d+-\d+)'$")
+CHILD_TIMEOUT = 60  # Seconds.
+
+
+def waitForChildren(pids):
+    # Returns the exit status of each child. Children that hang, e.g.
+    # on a lock held by a thread that didn't survive the fork, are killed.
+    deadline = time.monotonic() + CHILD_TIMEOUT
+    statuses = {}
+    while len(statuses) < len(pids):
+        for pid in pids:
+            if pid not in statuses:
+                done, status = os.waitpid(pid, os.WNOHANG)
+                if done:  # os.waitstatus_to_exitcode() is 3.9+.
+                    statuses[pid] = (
+                        os.WEXITSTATUS(status) if os.WIFEXITED(status)
+                        else -os.WTERMSIG(status))
+        if time.monotonic() > deadline:
+            for pid in set(pids) - set(statuses):
+                os.kill(pid, 9)
+                os.waitpid(pid, 0)
+                statuses[pid] = 'hung'
+        time.sleep(0.01)
+    return statuses
+
+
+def runInChild(func):
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        code = 1
+        try:
+            code = 0 if func() else 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'Requires os.fork().')
+class TestForks(unittest.TestCase):
+    def testForkUnderLoad(self):
+        numThreads, numChildren, childCalls = 4, 32, 100
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'out.log')
+            # A buffered stream, whose buffer a child would duplicate if it
+            # weren't empty at the fork.
+            stream = open(path, 'a')
+            ic = IceCreamDebugger(
+                outputFunction=lambda s: writeRecord(s, stream))
+            stop = threading.Event()
+            written = [0] * numThreads
+
+            def parentWorker(index):
+                while not stop.is_set():
+                    token = 'P-%i-%i' % (index, written[index])
+                    ic(token)
+                    written[index] += 1
+
+            threads = [
+                threading.Thread(target=parentWorker, args=(i,))
+                for i in range(numThreads)]
+            for thread in threads:
+                thread.start()
+
+            def child(index):
+                for i in range(childCalls):
+                    token = 'C-%i-%i' % (index, i)
+                    ic(token)
+                return True
+
+            try:
+                pids = []
+                for index in range(numChildren):
+                    pids.append(runInChild(lambda index=index: child(index)))
+                statuses = waitForChildren(pids)
+            finally:
+                stop.set()
+                for thread in threads:
+                    thread.join()
+                stream.close()
+
+            with open(path) as f:
+                lines = f.read().splitlines()
+
+        assert set(statuses.values()) == {0}, statuses
+        tokens = []
+        for line in lines:
+            match = LINE_RE.match(line)
+            assert match, line
+            tokens.append(match.group(1))
+        duplicated = [t for t, count in Counter(tokens).items() if count > 1]
+        assert not duplicated, duplicated[:10]
+
+        expected = set(
+            'P-%i-%i' % (index, i)
+            for index in range(numThreads) for i in range(written[index]))
+        expected.update(
+            'C-%i-%i' % (index, i)
+            for index in range(numChildren) for i in range(childCalls))
+        assert set(tokens) == expected, (
+            sorted(expected - set(tokens))[:10])
+
+    def testAggregatesArentInherited(self):
+        output = []
+        ic = IceCreamDebugger(outputFunction=output.append, aggregate=True)
+        for i in range(10):
+            ic(i)
+
+        def child():
+            ic(100)
+            ic.summarize()
+            return len(output) == 1 and 'n=1 ' in output[0]
+
+        statuses = waitForChildren([runInChild(child)])
+        assert list(statuses.values()) == [0]
+
+        ic.summarize()
+        assert len(output) == 1 and 'n=10 ' in output[0], output
+
+    def testAdminIsServedInChildren(self):
+        server = serveAdmin(debugger=IceCreamDebugger())
+        try:
+            def child():
+                response = sendCommand(defaultSocketPath(), 'config')
+                stopAdmin(server)
+                return (response['ok'] and
+                        not os.path.exists(defaultSocketPath()))
+
+            statuses = waitForChildren([runInChild(child)])
+            assert list(statuses.values()) == [0]
+            # The child didn't touch the parent's endpoint.
+            assert sendCommand(server.path, 'config')['ok']
+        finally:
+            stopAdmin(server)
+
+    def testStoppedAdminIsntServedInChildren(self):
+        server = serveAdmin(debugger=IceCreamDebugger())
+        stopAdmin(server)
+
+        def child():
+            return not os.path.exists(defaultSocketPath())
+
+        statuses = waitForChildren([runInChild(child)])
+        assert list(statuses.values()) == [0]
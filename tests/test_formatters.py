@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import array
+import hashlib
+import sys
+import unittest
+
+from dataclasses import dataclass, field
+from unittest import mock
+
+from icecream.formatters import BoundedRepr, BytesFormatter
+
+
+class TestBoundedRepr(unittest.TestCase):
+    def testIdenticalToReprWithinLimits(self):
+        r = BoundedRepr()
+        for obj in [
+                1, 1.5, None, 'str', b'bytes', [], (), {}, set(), frozenset(),
+                [1, 'a', (2,)], (1, 2), {'k': [1, {2: 3}]}, {1, 2},
+                frozenset({3}), [[[]]], object]:
+            assert r.repr(obj) == repr(obj)
+
+    def testMaxItems(self):
+        r = BoundedRepr(maxItems=3)
+        assert r.repr(list(range(10))) == '[0, 1, 2, ...]'
+        assert r.repr(dict.fromkeys(range(10), 0)) == '{0: 0, 1: 0, 2: 0, ...}'
+
+    def testMaxDepth(self):
+        r = BoundedRepr(maxDepth=2)
+        assert r.repr([1, [2, [3, [4]]]]) == '[1, [2, [...]]]'
+
+    def testMaxString(self):
+        r = BoundedRepr(maxString=13)
+        s = r.repr('a' * 100 + 'b' * 100)
+        assert s == "'aaaa...bbbb'"
+
+    def testMaxCharsStopsEarly(self):
+        class Counted:
+            reprs = 0
+
+            def __repr__(self):
+                Counted.reprs += 1
+                return 'x' * 10
+
+        r = BoundedRepr(maxChars=100)
+        s = r.repr([Counted() for _ in range(1000)])
+        assert len(s) == 100 + len('...') and s.endswith('...')
+        # Formatting stopped once the budget was used up.
+        assert Counted.reprs < 20
+
+    def testSelfReferentialContainers(self):
+        r = BoundedRepr()
+        lst = [1]
+        lst.append(lst)
+        dic = {'a': lst}
+        dic['self'] = dic
+        assert r.repr(lst) == repr(lst) == '[1, [...]]'
+        assert r.repr(dic) == repr(dic)
+
+        # Shared, but not cyclic, references are output in full.
+        shared = [1, 2]
+        assert r.repr([shared, shared]) == '[[1, 2], [1, 2]]'
+
+    def testDeepNestingDoesNotRecurse(self):
+        r = BoundedRepr(maxDepth=sys.getrecursionlimit() * 2)
+        nested = []
+        inner = nested
+        for _ in range(sys.getrecursionlimit() * 2):
+            inner.append([])
+            inner = inner[0]
+
+        s = r.repr(nested)
+        assert s.startswith('[[[[') and len(s) <= r.maxChars + len('...')
+
+    def testDataclasses(self):
+        @dataclass
+        class Point:
+            x: int
+            y: list = field(default_factory=list)
+            hidden: int = field(default=0, repr=False)
+
+        @dataclass
+        class Custom:
+            x: int
+
+            def __repr__(self):
+                return 'custom'
+
+        r = BoundedRepr(maxItems=2)
+        p = Point(1, [1, 2, 3])
+        assert r.repr(p).endswith('Point(x=1, y=[1, 2, ...])')
+        assert BoundedRepr().repr(p) == repr(p)
+        assert r.repr(Custom(1)) == 'custom'
+
+        # Records of scalars, or of strings, are output by repr() directly,
+        # still within the limits.
+        @dataclass
+        class Flat:
+            a: str
+            b: str
+            c: str
+
+        flat = Flat('a', 'b', 'c' * 100)
+        assert BoundedRepr().repr(flat) == repr(flat)
+        assert r.repr(flat).endswith("Flat(a='a', b='b', ...)")
+        assert BoundedRepr(maxString=13).repr(flat).endswith(
+            "c='cccc...cccc')")
+
+
+class TestBytesFormatter(unittest.TestCase):
+    def testShortBytesLikeRepr(self):
+        f = BytesFormatter()
+        assert f.format(b'abc') == repr(b'abc')
+        assert f.format(bytearray(b'abc')) == repr(bytearray(b'abc'))
+
+    def testLongBytesHexdumpHeadAndTail(self):
+        f = BytesFormatter(previewBytes=16)
+        data = b'A' * 16 + b'\x00' * 1000 + b'Z' * 16
+        lines = f.format(data).splitlines()
+        assert lines == [
+            'bytes(length=1032)',
+            '00000000  41 41 41 41 41 41 41 41  41 41 41 41 41 41 41 41  '
+            '|AAAAAAAAAAAAAAAA|',
+            '...',
+            '000003f0  00 00 00 00 00 00 00 00  5a 5a 5a 5a 5a 5a 5a 5a  '
+            '|........ZZZZZZZZ|',
+            '00000400  5a 5a 5a 5a 5a 5a 5a 5a                           '
+            '|ZZZZZZZZ|']
+
+    def testMemoryviewAndDigest(self):
+        f = BytesFormatter(digest='sha256')
+        data = bytes(range(256))
+        lines = f.format(memoryview(data)).splitlines()
+        assert lines[0] == 'memoryview(length=256, sha256=%s)' % (
+            hashlib.sha256(data).hexdigest())
+
+        ints = memoryview(array.array('i', [1, 2]))
+        assert f.format(ints).startswith('memoryview(length=%i' % (
+            2 * ints.itemsize))
+
+
+class TestRecordFields(unittest.TestCase):
+    def testSlotsClasses(self):
+        class Base:
+            __slots__ = ('a',)
+
+        class Point(Base):
+            __slots__ = ('x', 'y', '__private')
+
+            def __init__(self):
+                self.a, self.x = 1, [2]
+                self.__private = 3
+
+        class WithDict(Base):
+            pass
+
+        r = BoundedRepr()
+        p = Point()
+        assert r.repr(p).endswith('Point(a=1, x=[2], _Point__private=3)')
+        # Unset slots aren't output.
+        assert 'y=' not in r.repr(p)
+        # Instances with a __dict__ are output by their regular repr().
+        w = WithDict()
+        assert r.repr(w) == repr(w)
+
+    def testAttrsClasses(self):
+        try:
+            import attr
+        except ImportError:
+            self.skipTest('attrs is not installed.')
+
+        @attr.s
+        class Point:
+            x = attr.ib()
+            y = attr.ib(repr=False)
+
+        p = Point([1, 2, 3], 2)
+        assert BoundedRepr().repr(p) == repr(p) == 'Point(x=[1, 2, 3])'
+        assert BoundedRepr(maxItems=1).repr(p) == 'Point(x=[1, ...])'
+
+    def testFieldsAreIntrospectedOncePerClass(self):
+        @dataclass
+        class Point:
+            x: int
+
+        r = BoundedRepr()
+        r.repr(Point(1))
+        with mock.patch('dataclasses.fields') as fields:
+            assert r.repr(Point(2)).endswith('Point(x=2)')
+        assert not fields.called
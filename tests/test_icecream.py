@@ -12,10 +12,13 @@
 
 import functools
 import sys
+import time
 import unittest
 import warnings
 
 from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 from contextlib import contextmanager
 from os.path import basename, splitext, realpath
 
@@ -523,7 +526,7 @@ class TestIceCream(unittest.TestCase):
                 # we ignore the warning so that it doesn't interfere
                 # with parsing ic's output
                 warnings.simplefilter("ignore")
-                eval('ic(a, b)')
+                eval('ic(a + 0, b + 0)')
                 pairs = parseOutputIntoPairs(out, err, 1)
                 self.assertEqual(pairs, [[(None, '1'), (None, "2")]])
 
@@ -537,19 +540,47 @@ class TestIceCream(unittest.TestCase):
                 # we ignore the warning so that it doesn't interfere
                 # with parsing ic's output
                 warnings.simplefilter("ignore")
-                eval('ic(multilineStr)')
+                eval('ic(multilineStr + "")')
                 pair = parseOutputIntoPairs(out, err, 2)[0][0]
                 self.assertEqual(pair, (None, ic.argToStringFunction(multilineStr)))
 
     def testNoSourceAvailableIssuesExactlyOneWarning(self):
         with disableColoring(), captureStandardStreams() as (out, err):
             with warnings.catch_warnings(record=True) as allWarnings:
-                eval('ic(a)')
-                eval('ic(b)')
+                eval('ic(a + 0)')
+                eval('ic(b + 0)')
                 assert len(allWarnings) == 1
                 warning = allWarnings[-1]
                 assert NO_SOURCE_AVAILABLE_WARNING_MESSAGE in str(warning.message)
 
+    def testNoSourceAvailableNamesSimpleArgsFromBytecode(self):
+        d = {'k': [a]}
+        o = SimpleNamespace(x=b)
+        with disableColoring(), captureStandardStreams() as (out, err):
+            with warnings.catch_warnings(record=True) as allWarnings:
+                warnings.simplefilter("always")
+                eval('ic(a, o.x, d["k"][0], 3)')
+                eval('ic(a + 0, b)')
+        pairs = parseOutputIntoPairs(out, err, 2)
+        self.assertEqual(pairs[0], [
+            ('a', '1'), ('o.x', '2'), ("d['k'][0]", '1'), (None, '3')])
+        self.assertEqual(pairs[1], [(None, '1'), ('b', '2')])
+        # Only the call with an unnameable argument warns.
+        self.assertEqual(len(allWarnings), 1)
+
+    def testNoSourceAvailableIsOnlyAnalyzedOnce(self):
+        code = compile('for i in range(3): ic(i + 0)', '<stdin>', 'exec')
+        with disableColoring(), captureStandardStreams() as (out, err):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                with mock.patch.object(
+                        ic, '_analyzeArgStrs',
+                        wraps=ic._analyzeArgStrs) as analyze:
+                    exec(code)
+        self.assertEqual(analyze.call_count, 1)
+        pairs = parseOutputIntoPairs(out, err, 3)
+        self.assertEqual(pairs, [[(None, '0')], [(None, '1')], [(None, '2')]])
+
     def testSingleTupleArgument(self):
         with disableColoring(), captureStandardStreams() as (out, err):
             ic((a, b))
@@ -599,6 +630,18 @@ ic| (a,
      list(range(15))]: [[0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14],
                         [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14]]""")
 
+    def testArgumentTextIsSlicedWithoutAsttokens(self):
+        s = 'ü'
+        fail = mock.Mock(side_effect=AssertionError('asttokens was built.'))
+        with mock.patch.object(icecream.icecream.Source, 'asttokens', fail):
+            with disableColoring(), captureStandardStreams() as (out, err):
+                ic('ü', s, [s,
+                            'ü'])
+
+        output = err.getvalue()
+        self.assertIn("| s: 'ü'", output)
+        self.assertIn("[s,\n 'ü']: ['ü', 'ü']", output)
+
     def testMultipleTupleArguments(self):
         with disableColoring(), captureStandardStreams() as (out, err):
             ic((a, b), (b, a), a, b)
@@ -616,3 +659,133 @@ ic| (a,
     def testConfigureOutputWithNoParameters(self):
         with self.assertRaises(TypeError):
             ic.configureOutput()
+
+    def testAggregateNumericValues(self):
+        lst = []
+        ic.configureOutput(aggregate=True)
+        try:
+            with configureIcecreamOutput(outputFunction=lst.append):
+                for i in range(10):
+                    ic(i)
+                ic('notANumber')
+                assert len(lst) == 1 and "'notANumber'" in lst[0]
+                # Too big for a float, so output as usual.
+                assert ic(2 ** 1100) == 2 ** 1100
+                assert len(lst) == 2 and str(2 ** 1100) in lst[1]
+
+                ic.summarize()
+        finally:
+            ic.configureOutput(aggregate=False)
+            ic._aggregates.clear()
+
+        summary = lst[-1]
+        assert summary.startswith(ic.prefix)
+        assert 'i: n=10 min=0 max=9 mean=4.5' in summary
+        assert 'p50=' in summary
+
+    def testAggregateInterval(self):
+        lst = []
+        ic.configureOutput(aggregate=True, aggregateInterval=0.000001)
+        try:
+            with configureIcecreamOutput(outputFunction=lst.append):
+                for i in range(3):
+                    time.sleep(0.001)
+                    ic(a, b)
+        finally:
+            ic.configureOutput(aggregate=False, aggregateInterval=None)
+            ic._aggregates.clear()
+
+        # Each call past the interval outputs one summary line per argument.
+        assert len(lst) == 6
+        assert 'a: n=3 min=1 max=1' in lst[-2]
+        assert 'b: n=3 min=2 max=2' in lst[-1]
+
+    def testCacheStats(self):
+        with disableColoring(), captureStandardStreams() as (out, err):
+            for i in range(3):
+                ic(i)
+
+        stats = ic.cacheStats()
+        assert stats['callSites']['hits'] >= 2
+        sources = stats['sources']
+        assert 0 < sources['entries'] <= sources['maxEntries']
+        assert 0 < sources['bytes'] <= sources['maxBytes']
+
+    def testConfigureCachesEvicts(self):
+        sourceCache = icecream.icecream.sourceCache
+        limits = sourceCache.maxEntries, sourceCache.maxBytes
+        try:
+            with disableColoring(), captureStandardStreams():
+                ic(a)
+            ic.configureCaches(maxSources=0)
+            assert ic.cacheStats()['sources']['entries'] == 0
+        finally:
+            sourceCache.resize(*limits)
+
+        with self.assertRaises(TypeError):
+            ic.configureCaches()
+
+    def testConfigurePersistentCallSites(self):
+        callSiteCache = icecream.icecream.callSiteCache
+        persistent = callSiteCache.persistent
+        try:
+            ic.configureCaches(persistentCallSites=False)
+            assert not callSiteCache.persistent
+            ic.configureCaches(persistentCallSites=True)
+            assert callSiteCache.persistent
+        finally:
+            callSiteCache.persistent = persistent
+
+    def testIncludeAndExcludeFilters(self):
+        def loud():
+            ic(a)
+
+        def quiet():
+            ic(b)
+
+        def callBoth():
+            with disableColoring(), captureStandardStreams() as (out, err):
+                loud()
+                quiet()
+            return err.getvalue()
+
+        try:
+            ic.configureOutput(exclude='func:*quiet')
+            output = callBoth()
+            assert 'a: 1' in output and 'b: 2' not in output
+
+            ic.configureOutput(include=__name__, exclude=None)
+            output = callBoth()
+            assert 'a: 1' in output and 'b: 2' in output
+
+            ic.configureOutput(include=['nonexistent.*'])
+            assert callBoth() == ''
+        finally:
+            ic.configureOutput(include=None, exclude=None)
+
+    def testSingledispatchScalarFastPaths(self):
+        assert argumentToString(1) == '1'
+        assert argumentToString(None) == 'None'
+        assert argumentToString('a\nb') == "'a\nb'"
+
+        @argumentToString.register(int)
+        def argumentToString_int(obj):
+            return 'int!'
+        try:
+            assert argumentToString(1) == 'int!'
+            # bool subclasses int, so singledispatch dispatches it to int.
+            assert argumentToString(True) == 'int!'
+            assert ic.format(1).endswith('int!')
+        finally:
+            argumentToString.unregister(int)
+        assert argumentToString(1) == '1'
+
+        # Registering a base class also bypasses the fast paths.
+        default = argumentToString.registry[object]
+        argumentToString.register(object, lambda obj: 'object!')
+        try:
+            assert argumentToString(1.5) == 'object!'
+            assert argumentToString('a') == 'object!'
+        finally:
+            argumentToString.register(object, default)
+        assert argumentToString(1.5) == '1.5'
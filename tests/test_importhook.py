@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import importlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import unittest.mock
+
+import icecream
+
+from .test_icecream import configureIcecreamOutput
+
+
+# No ic() is defined in this module, so calling it raises a NameError.
+MODULE_SOURCE = '''
+def none():
+    return ic()
+
+def single(x):
+    return ic(x)
+
+def multiple(a, b):
+    return ic(a, ic(b))
+
+def attribute():
+    return ic.format(1)
+'''
+
+
+class TestStripCalls(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        packageDir = os.path.join(self.tmpdir, 'icstrippkg')
+        os.mkdir(packageDir)
+        with open(os.path.join(packageDir, '__init__.py'), 'w') as f:
+            f.write('')
+        with open(os.path.join(packageDir, 'mod.py'), 'w') as f:
+            f.write(MODULE_SOURCE)
+        sys.path.insert(0, self.tmpdir)
+        self.hook = icecream.stripCalls(['icstrippkg'])
+
+    def tearDown(self):
+        icecream.removeImportHook(self.hook)
+        sys.path.remove(self.tmpdir)
+        for name in ['icstrippkg', 'icstrippkg.mod']:
+            sys.modules.pop(name, None)
+        shutil.rmtree(self.tmpdir)
+
+    def importModule(self):
+        sys.modules.pop('icstrippkg.mod', None)
+        importlib.invalidate_caches()
+        return importlib.import_module('icstrippkg.mod')
+
+    def testCallsAreRewrittenToTheirReturnValue(self):
+        mod = self.importModule()
+        assert mod.none() is None
+        assert mod.single(3) == 3
+        assert mod.multiple(1, 2) == (1, 2)
+        # Only calls to ic() itself are rewritten.
+        with self.assertRaises(NameError):
+            mod.attribute()
+
+    def testRewrittenCodeIsCached(self):
+        with unittest.mock.patch.object(sys, 'dont_write_bytecode', False):
+            self.importModule()
+        cacheDir = os.path.join(self.tmpdir, 'icstrippkg', '__pycache__')
+        cached = [f for f in os.listdir(cacheDir) if '.opt-icstrip' in f]
+        assert cached
+
+        # The cached, rewritten code is used without parsing the source.
+        with unittest.mock.patch('ast.parse') as parse:
+            mod = self.importModule()
+        assert not parse.called
+        assert mod.single(3) == 3
+
+    def testCacheTagsDifferPerOptimizationLevel(self):
+        code = (
+            'from icecream.importhook import cacheTag;'
+            ' print(cacheTag("s", []))')
+        tags = set(
+            subprocess.check_output([sys.executable] + flags + ['-c', code])
+            for flags in ([], ['-O'], ['-OO']))
+        assert len(tags) == 3
+
+    def testOtherPackagesAreNotRewritten(self):
+        icecream.removeImportHook(self.hook)
+        self.hook = icecream.stripCalls(['someotherpackage'])
+        mod = self.importModule()
+        with self.assertRaises(NameError):
+            mod.single(3)
+
+
+SPECIALIZED_MODULE_SOURCE = '''"""Docstring."""
+from __future__ import annotations
+
+from icecream import ic
+
+a, b = 1, 2
+
+def single(x):
+    return ic(x)
+
+def multiple():
+    return ic(a,
+              'b', ic(b))
+
+def none():
+    return ic()
+'''
+
+
+class TestSpecializeCalls(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        with open(os.path.join(self.tmpdir, 'icspecialmod.py'), 'w') as f:
+            f.write(SPECIALIZED_MODULE_SOURCE)
+        sys.path.insert(0, self.tmpdir)
+        self.hook = icecream.specializeCalls(['icspecialmod'])
+        importlib.invalidate_caches()
+        self.mod = importlib.import_module('icspecialmod')
+
+    def tearDown(self):
+        icecream.removeImportHook(self.hook)
+        sys.path.remove(self.tmpdir)
+        sys.modules.pop('icspecialmod', None)
+        shutil.rmtree(self.tmpdir)
+
+    def testCallSiteTable(self):
+        sites = self.mod.__icecream_call_sites__
+        assert self.mod.__doc__ == 'Docstring.'
+        assert sites[0] == (('x',), (False,))
+        assert sites[1] == (("a", "'b'", 'ic(b)'), (False, True, False))
+
+    def testSpecializedCallsDontAnalyzeSource(self):
+        lst = []
+        with configureIcecreamOutput(outputFunction=lst.append):
+            with unittest.mock.patch.object(
+                    icecream.icecream.Source, 'executing') as executing:
+                assert self.mod.single(3) == 3
+                assert self.mod.multiple() == (1, 'b', 2)
+                assert self.mod.none() is None
+        assert not executing.called
+
+        assert lst[0] == 'ic| x: 3'
+        assert lst[1] == 'ic| b: 2'
+        assert lst[2] == 'ic| ' + icecream.ic._pairDelimiter.join(
+            ['a: 1', "'b'", 'ic(b): 2'])
+        assert lst[3].startswith('ic| ')
+
+
+class TestWriteRewrittenCalls(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.sourceDir = os.path.join(self.tmpdir, 'src')
+        self.outputDir = os.path.join(self.tmpdir, 'out')
+        packageDir = os.path.join(self.sourceDir, 'icaotpkg', 'sub')
+        os.makedirs(packageDir)
+        for path, source in [
+                (('__init__.py',), ''), (('sub', '__init__.py'), ''),
+                (('sub', 'stripped.py'), MODULE_SOURCE),
+                (('specialized.py',), SPECIALIZED_MODULE_SOURCE)]:
+            with open(os.path.join(
+                    self.sourceDir, 'icaotpkg', *path), 'w') as f:
+                f.write(source)
+
+    def tearDown(self):
+        self.tearDownModules()
+        shutil.rmtree(self.tmpdir)
+
+    def tearDownModules(self):
+        for name in ['icaotpkg', 'icaotpkg.sub', 'icaotpkg.sub.stripped']:
+            sys.modules.pop(name, None)
+
+    def testStrippedModulesImportWithoutSource(self):
+        sys.path.insert(0, self.sourceDir)
+        try:
+            written = icecream.writeStrippedCalls(['icaotpkg'], self.outputDir)
+        finally:
+            sys.path.remove(self.sourceDir)
+            self.tearDownModules()
+        assert sorted(
+            os.path.relpath(path, self.outputDir) for path in written) == [
+                os.path.join('icaotpkg', '__init__.pyc'),
+                os.path.join('icaotpkg', 'specialized.pyc'),
+                os.path.join('icaotpkg', 'sub', '__init__.pyc'),
+                os.path.join('icaotpkg', 'sub', 'stripped.pyc')]
+
+        # Like in a frozen application, only the .pyc files are left.
+        shutil.rmtree(self.sourceDir)
+        sys.path.insert(0, self.outputDir)
+        try:
+            importlib.invalidate_caches()
+            mod = importlib.import_module('icaotpkg.sub.stripped')
+        finally:
+            sys.path.remove(self.outputDir)
+        assert mod.single(3) == 3
+        assert mod.multiple(1, 2) == (1, 2)
+
+    def testSpecializeCommand(self):
+        repoDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.check_call(
+            [sys.executable, '-m', 'icecream', 'specialize',
+             '-o', self.outputDir, 'icaotpkg'],
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(
+                [repoDir, self.sourceDir])),
+            stdout=subprocess.DEVNULL)
+        shutil.rmtree(self.sourceDir)
+
+        # Specialized calls' output is complete without their source, where
+        # ic() would otherwise warn that it can't find it.
+        code = 'from icaotpkg import specialized; specialized.multiple()'
+        result = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(
+                [repoDir, self.outputDir])))
+        assert result.returncode == 0, result.stderr
+        assert result.stderr.decode('utf8').splitlines() == [
+            'ic| b: 2', "ic| a: 1, 'b', ic(b): 2"]
+
+        result = subprocess.run(
+            [sys.executable, '-m', 'icecream', 'specialize', '-o',
+             self.outputDir, 'icnosuchpkg'],
+            env=dict(os.environ, PYTHONPATH=repoDir), capture_output=True)
+        assert result.returncode == 1
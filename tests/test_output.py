@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import re
+import sys
+import threading
+import time
+import unittest
+from io import StringIO
+from unittest import mock
+
+from icecream import IceCreamDebugger
+from icecream.icecream import colorizedStderrPrint
+from icecream.output import writeRecord
+
+
+# Scaled down from 64 threads x 100k calls to keep the suite fast. See
+# benchmarks/bench_threads.py for the full run.
+NUM_THREADS = 64
+CALLS_PER_THREAD = 200
+
+
+class ChoppyStream(StringIO):
+    """
+    Writes in two halves and yields to other threads in between, so
+    unsynchronized writers interleave.
+    """
+    def write(self, s):
+        half = len(s) // 2
+        super().write(s[:half])
+        time.sleep(0)
+        return super().write(s[half:])
+
+
+class TtyStream(StringIO):
+    def isatty(self):
+        return True
+
+
+class TestWriteRecord(unittest.TestCase):
+    def testOneWritePerRecord(self):
+        stream = mock.Mock(spec=['write', 'flush'])
+        writeRecord('ic| a: 1\n    b: 2', stream)
+        stream.write.assert_called_once_with('ic| a: 1\n    b: 2\n')
+
+    def testColorsAreStrippedUnlessATerminal(self):
+        colored = '\x1b[38;5;245mic|\x1b[39m 1'
+        stream = StringIO()
+        writeRecord(colored, stream, colored=True)
+        assert stream.getvalue() == 'ic| 1\n'
+
+        stream = TtyStream()
+        writeRecord(colored, stream, colored=True)
+        assert stream.getvalue() == colored + '\n'
+
+    def testColorizedOutputDoesntReplaceStderr(self):
+        stderr = StringIO()
+        with mock.patch.object(sys, 'stderr', stderr):
+            colorizedStderrPrint('ic| 1')
+            assert sys.stderr is stderr
+        assert stderr.getvalue() == 'ic| 1\n'
+
+    def testThreadsDontInterleave(self):
+        stream = ChoppyStream()
+        ic = IceCreamDebugger(outputFunction=lambda s: writeRecord(s, stream))
+
+        def run(threadIndex):
+            for i in range(CALLS_PER_THREAD):
+                token = 'T%02i-%06i' % (threadIndex, i)
+                ic(token)
+
+        threads = [
+            threading.Thread(target=run, args=(i,))
+            for i in range(NUM_THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == NUM_THREADS * CALLS_PER_THREAD
+        pattern = re.compile(r"^ic\| token: '(T\d\d-\d{6})'$")
+        tokens = set()
+        for line in lines:
+            match = pattern.match(line)
+            assert match, line
+            tokens.add(match.group(1))
+        assert len(tokens) == len(lines)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import asyncio
+import unittest
+
+from icecream import IceCreamDebugger
+
+
+class TestScopes(unittest.TestCase):
+    def setUp(self):
+        self.output = []
+        self.ic = IceCreamDebugger(outputFunction=self.output.append)
+
+    def testScope(self):
+        a = 1
+        with self.ic.scope(prefix='req| ', includeContext=True):
+            self.ic(a)
+        self.ic(a)
+        assert self.output[0].startswith('req| ')
+        assert self.ic.contextDelimiter in self.output[0]
+        assert self.output[1] == 'ic| a: 1'
+
+    def testNesting(self):
+        a = 1
+        with self.ic.scope(prefix='outer| '):
+            with self.ic.scope(argToStringFunction=lambda obj: 'x'):
+                self.ic(a)
+            self.ic(a)
+        assert self.output == ['outer| a: x', 'outer| a: 1']
+
+    def testTasksAreIsolated(self):
+        a = 1
+
+        async def request(prefix):
+            if prefix:
+                with self.ic.scope(prefix=prefix):
+                    await asyncio.sleep(0)  # Lets the other task run.
+                    self.ic(a)
+            else:
+                await asyncio.sleep(0)
+                self.ic(a)
+
+        async def main():
+            await asyncio.gather(request('traced| '), request(None))
+
+        asyncio.run(main())
+        assert sorted(self.output) == ['ic| a: 1', 'traced| a: 1']
+
+    def testFollowsTheDebugger(self):
+        a = 1
+        with self.ic.scope(prefix='req| '):
+            self.ic.configureOutput(argToStringFunction=lambda obj: 'x')
+            self.ic(a)
+            self.ic.disable()
+            self.ic(a)
+        assert self.output == ['req| a: x']
+
+    def testEnabledForOneScope(self):
+        a = 1
+        self.ic.disable()
+        with self.ic.scope(enabled=True):
+            self.ic(a)
+        self.ic(a)
+        assert self.output == ['ic| a: 1']
+
+    def testFilters(self):
+        a = 1
+        with self.ic.scope(exclude='*'):
+            self.ic(a)
+        self.ic(a)
+        assert self.output == ['ic| a: 1']
+        assert self.ic.callStats()['dropped']['filter'] == 1
+
+    def testContextFormat(self):
+        a = 1
+        with self.ic.scope(
+                prefix='', includeContext=True, contextFormat='{func}'):
+            self.ic(a)
+        assert self.output == ['testContextFormat()- a: 1']
+
+    def testMergedOnce(self):
+        with self.ic.scope(prefix='req| '):
+            scoped = self.ic._scope.get()
+            assert scoped.get() is scoped.get()
+            self.ic.configureOutput(includeContext=True)
+            assert scoped.get().includeContext
+
+    def testInvalidSettings(self):
+        with self.assertRaises(ValueError):
+            with self.ic.scope(contextFields=['nope']):
+                pass
+        with self.assertRaises(ValueError):
+            with self.ic.scope(sampleEvery=0):
+                pass
+        with self.assertRaises(TypeError):
+            with self.ic.scope(aggregate=True):
+                pass
+        assert self.ic._scope.get() is None
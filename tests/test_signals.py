@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import os
+import signal
+import unittest
+
+from icecream import (
+    IceCreamDebugger, installSignalHandlers, removeSignalHandlers)
+
+
+@unittest.skipUnless(hasattr(signal, 'SIGUSR1'), 'Requires POSIX signals.')
+class TestSignalHandlers(unittest.TestCase):
+    def setUp(self):
+        self.output = []
+        self.ic = IceCreamDebugger(outputFunction=self.output.append)
+        self.handlers = installSignalHandlers(self.ic)
+
+    def tearDown(self):
+        removeSignalHandlers(self.handlers)
+
+    def testToggle(self):
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert not self.ic.enabled
+        self.ic(1)
+        assert self.output == []
+
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert self.ic.enabled
+        self.ic(1)
+        assert len(self.output) == 1
+
+    def testCycleSampling(self):
+        levels = []
+        for _ in range(5):
+            os.kill(os.getpid(), signal.SIGUSR2)
+            levels.append(self.ic.sampleEvery)
+        assert levels == [10, 100, 1000, 1, 10]
+
+        for i in range(30):
+            self.ic(i)
+        assert len(self.output) == 3
+
+    def testRemoveRestoresPreviousHandlers(self):
+        removeSignalHandlers(self.handlers)
+        assert signal.getsignal(signal.SIGUSR1) == signal.SIG_DFL
+        self.handlers = installSignalHandlers(self.ic)
+
+
+class TestSampling(unittest.TestCase):
+    def testSampleEvery(self):
+        output = []
+        ic = IceCreamDebugger(outputFunction=output.append)
+        ic.configureOutput(sampleEvery=4)
+        for i in range(12):
+            assert ic(i) == i  # Unsampled calls still return their argument.
+        assert len(output) == 3
+
+        with self.assertRaises(ValueError):
+            ic.configureOutput(sampleEvery=0)
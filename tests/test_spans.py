@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import asyncio
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from icecream import IceCreamDebugger
+from icecream.spans import SpanRecorder
+
+
+def spanEvents(ic):
+    return [e for e in ic.traceEvents()['traceEvents'] if e['ph'] == 'X']
+
+
+class TestSpans(unittest.TestCase):
+    def setUp(self):
+        self.ic = IceCreamDebugger(outputFunction=lambda s: None)
+
+    def testNesting(self):
+        with self.ic.span('outer'):
+            with self.ic.span('inner'):
+                pass
+            with self.ic.span():
+                pass
+
+        inner, unnamed, outer = spanEvents(self.ic)
+        assert (inner['name'], unnamed['name'], outer['name']) == (
+            'inner', 'testNesting', 'outer')
+        for span in (inner, unnamed):
+            assert outer['ts'] <= span['ts']
+            assert span['ts'] + span['dur'] <= outer['ts'] + outer['dur']
+        assert inner['ts'] + inner['dur'] <= unnamed['ts']
+        assert outer['args']['file'] == 'test_spans.py'
+        assert outer['args']['func'] == 'testNesting'
+        assert outer['tid'] == threading.get_native_id()
+        assert outer['pid'] == os.getpid()
+
+    def testTimed(self):
+        @self.ic.timed
+        def load():
+            return 1
+
+        @self.ic.timed('fetching')
+        async def fetch():
+            await asyncio.sleep(0)
+            return 2
+
+        assert load() == 1
+        assert asyncio.run(fetch()) == 2
+        assert [e['name'] for e in spanEvents(self.ic)] == [
+            'TestSpans.testTimed.<locals>.load', 'fetching']
+        assert load.__name__ == 'load'
+
+    def testExceptions(self):
+        with self.assertRaises(KeyError):
+            with self.ic.span('failing'):
+                raise KeyError
+        assert [e['name'] for e in spanEvents(self.ic)] == ['failing']
+
+    def testContext(self):
+        self.ic.configureOutput(includeContext=True, contextFormat='{func}')
+        with self.ic.span('s'):
+            pass
+        event, = spanEvents(self.ic)
+        assert event['args']['context'] == 'testContext()'
+
+    def testDisabled(self):
+        self.ic.disable()
+        with self.ic.span('s'):
+            pass
+        with self.ic.scope(enabled=True):
+            with self.ic.span('scoped'):
+                pass
+        assert [e['name'] for e in spanEvents(self.ic)] == ['scoped']
+
+    def testThreads(self):
+        def run():
+            with self.ic.span('worker'):
+                pass
+
+        thread = threading.Thread(target=run, name='span-worker')
+        thread.start()
+        thread.join()
+        with self.ic.span('main'):
+            pass
+
+        events = self.ic.traceEvents()['traceEvents']
+        names = dict(
+            (e['tid'], e['args']['name']) for e in events if e['ph'] == 'M')
+        tids = dict((e['name'], e['tid']) for e in events if e['ph'] == 'X')
+        assert names[tids['worker']] == 'span-worker'
+        assert names[tids['main']] == threading.current_thread().name
+
+    def testExportTrace(self):
+        with self.ic.span('s'):
+            pass
+        f = io.StringIO()
+        self.ic.exportTrace(f)
+        assert json.loads(f.getvalue()) == self.ic.traceEvents()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'trace.json')
+            self.ic.exportTrace(path)
+            with open(path) as f:
+                assert json.load(f) == self.ic.traceEvents()
+
+        self.ic.clearSpans()
+        assert spanEvents(self.ic) == []
+
+    def testMaxSpans(self):
+        recorder = SpanRecorder(maxSpans=3)
+        record = recorder.recorder()
+        for i in range(10):
+            record(('s%i' % i, i, i + 1, self.testMaxSpans.__code__, 1, None))
+        (_, _, spans), = recorder.spans()
+        assert [span[0] for span in spans] == ['s7', 's8', 's9']
+
+    def testFinishedThreadsAreBounded(self):
+        recorder = SpanRecorder(maxSpans=3)
+
+        def run(i):
+            recorder.recorder()(
+                ('t%i' % i, i, i + 1, self.testMaxSpans.__code__, 1, None))
+
+        for i in range(10):
+            thread = threading.Thread(target=run, args=(i,))
+            thread.start()
+            thread.join()
+        assert [spans[0][0] for _, _, spans in recorder.spans()] == [
+            't7', 't8', 't9']
+        assert len(recorder._retired) == 3 and not recorder._buffers
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import random
+import statistics
+import unittest
+
+from icecream.stats import P2Quantile, RunningStats
+
+
+class TestStats(unittest.TestCase):
+    def testRunningStatsMatchesStatistics(self):
+        values = [random.uniform(-100, 100) for _ in range(1000)]
+        stats = RunningStats()
+        for v in values:
+            stats.add(v)
+
+        assert stats.count == len(values)
+        assert stats.min == min(values) and stats.max == max(values)
+        self.assertAlmostEqual(stats.mean, statistics.mean(values))
+        self.assertAlmostEqual(stats.variance, statistics.variance(values))
+
+    def testP2QuantileApproximatesMedian(self):
+        rng = random.Random(1)
+        values = [rng.random() for _ in range(10000)]
+        quantile = P2Quantile(0.5)
+        for v in values:
+            quantile.add(v)
+
+        self.assertAlmostEqual(quantile.value(), statistics.median(values),
+                               delta=0.02)
+
+    def testP2QuantileFewValues(self):
+        quantile = P2Quantile(0.5)
+        for v in [3, 1, 2]:
+            quantile.add(v)
+        assert quantile.value() == 2
+
+    def testTailQuantilesOfFewValues(self):
+        # Past five values, but too few for the markers' estimates.
+        for n in (5, 6, 50):
+            stats = RunningStats()
+            for v in range(n):
+                stats.add(v)
+            p50, p90, p99 = (q.value() for q in stats.quantiles)
+            assert (p50, p90, p99) == (
+                round(0.5 * (n - 1)), round(0.9 * (n - 1)),
+                round(0.99 * (n - 1))), (n, p50, p90, p99)
+
+    def testSummary(self):
+        stats = RunningStats()
+        for v in range(10):
+            stats.add(v)
+        assert stats.summary().startswith('n=10 min=0 max=9 mean=4.5 std=')
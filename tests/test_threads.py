@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+#
+# IceCream - Never use print() to debug again
+#
+# Ansgar Grunseid
+# grunseid.com
+# grunseid@gmail.com
+#
+# License: MIT
+#
+
+import sys
+import threading
+import unittest
+
+from icecream import IceCreamDebugger
+from icecream.icecream import singledispatch
+
+
+NUM_THREADS = 8
+CALLS_PER_THREAD = 2000
+
+
+def runThreads(target):
+    threads = [threading.Thread(target=target) for _ in range(NUM_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestThreadSafety(unittest.TestCase):
+    """
+    Shared state under concurrent ic() calls. These pass with the GIL, too,
+    but only exercise the races without it, e.g. on python3.13t.
+    """
+    def setUp(self):
+        # Switch threads as often as possible.
+        self.switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switchInterval)
+
+    def testAggregateCountsAreExact(self):
+        output = []
+        ic = IceCreamDebugger(outputFunction=output.append, aggregate=True)
+
+        def run():
+            for i in range(CALLS_PER_THREAD):
+                ic(i % 10)
+
+        runThreads(run)
+        ic.configureOutput(aggregate=False)
+        ic.summarize()
+
+        assert len(output) == 1
+        expected = 'n=%i min=0 max=9 mean=4.5 ' % (
+            NUM_THREADS * CALLS_PER_THREAD)
+        assert expected in output[0], output[0]
+
+    def testRegisterWhileDispatching(self):
+        @singledispatch
+        def toString(obj):
+            return 'default'
+        toString.setFastPaths({int: lambda obj: 'default'})
+
+        errors = []
+        stop = threading.Event()
+
+        def dispatch():
+            while not stop.is_set():
+                try:
+                    assert toString(1) in ('default', 'int')
+                    assert toString('s') == 'default'
+                except Exception as e:  # pragma: no cover
+                    errors.append(e)
+                    return
+
+        threads = [threading.Thread(target=dispatch) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for _ in range(200):
+            toString.register(int, lambda obj: 'int')
+            toString.unregister(int)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert toString(1) == 'default'